@@ -16,6 +16,7 @@ TO-DO:
 """
 
 import random, os, sys
+from collections import OrderedDict, namedtuple
 from functools import partial
 
 from PySide2 import QtWidgets, QtGui, QtCore
@@ -24,6 +25,7 @@ from shiboken2 import wrapInstance
 from maya.app.general.mayaMixin import MayaQWidgetDockableMixin
 import maya.OpenMayaUI as omui
 import maya.OpenMaya as om
+import maya.api.OpenMaya as om2
 import maya.cmds as cmds
 import maya.mel as mel
 
@@ -47,6 +49,298 @@ def delete_workspace_control(control):
         cmds.deleteUI(control, control=True)
 
 
+# One instance of a camera: its registry key, full paths and shortest unique name
+Camera = namedtuple("Camera", ["key", "transform", "shape", "name"])
+
+
+class CameraRegistry(object):
+    """
+    The non startup cameras of the scene, in creation order, one Camera per
+    instance of every camera shape.
+    Node added/removed callbacks on camera shapes keep it up to date, so reading
+    it never lists the scene. It is only rebuilt when a scene is opened.
+    on_change is called whenever a camera shape is added or removed, and
+    on_rename with the Cameras of a shape whenever it or its transforms are renamed.
+
+    Shapes are keyed by their MObjectHandle hash code: imports and references
+    give nodes their UUID only after they are added.
+    """
+
+    def __init__(self, on_change=None, on_rename=None):
+        # Camera shape hash code: MObjectHandle of the shape
+        self.handles = OrderedDict()
+        # Camera shape hash code: its Cameras, empty for startup cameras
+        self.cameras = {}
+        # Camera shape hash code: startupCamera flag, which never changes for a node
+        self.startup = {}
+        self.pending = set()
+        self.items = []
+        self.names = []
+        self.callbacks = []
+        # Camera shape hash code: name changed callbacks of the shape and its transforms
+        self.name_callbacks = {}
+        self.on_change = on_change
+        self.on_rename = on_rename
+
+    def watch(self):
+        self.callbacks = [
+            om2.MDGMessage.addNodeAddedCallback(self.node_added, "camera"),
+            om2.MDGMessage.addNodeRemovedCallback(self.node_removed, "camera"),
+        ]
+
+    def unwatch(self):
+        if self.callbacks:
+            om2.MMessage.removeCallbacks(self.callbacks)
+        self.callbacks = []
+        for node_id in list(self.name_callbacks):
+            self.unwatch_names(node_id)
+
+    def watch_names(self, node_id, node):
+        self.unwatch_names(node_id)
+        nodes = [node]
+        for path in om2.MFnDagNode(node).getAllPaths():
+            path.pop()
+            nodes.append(path.node())
+        self.name_callbacks[node_id] = [
+            om2.MNodeMessage.addNameChangedCallback(n, self.name_changed, node_id)
+            for n in nodes
+        ]
+
+    def unwatch_names(self, node_id):
+        callbacks = self.name_callbacks.pop(node_id, None)
+        if callbacks:
+            om2.MMessage.removeCallbacks(callbacks)
+
+    def name_changed(self, node, previous_name, node_id):
+        if node_id not in self.handles:
+            return
+        self.pending.add(node_id)
+        self.resolve()
+        if self.on_rename:
+            self.on_rename(self.cameras.get(node_id, []))
+
+    def add(self, node):
+        handle = om2.MObjectHandle(node)
+        node_id = handle.hashCode()
+        self.handles[node_id] = handle
+        self.pending.add(node_id)
+
+    def node_added(self, node, *args):
+        # Shapes are not parented yet when they are added, resolve them on read
+        self.add(node)
+        if self.on_change:
+            self.on_change()
+
+    def node_removed(self, node, *args):
+        node_id = om2.MObjectHandle(node).hashCode()
+        self.handles.pop(node_id, None)
+        self.startup.pop(node_id, None)
+        self.pending.discard(node_id)
+        self.unwatch_names(node_id)
+        if self.cameras.pop(node_id, None):
+            self.update_names()
+            if self.on_change:
+                self.on_change()
+
+    def rebuild(self):
+        """One pass over the camera shapes of the scene."""
+        for node_id in list(self.name_callbacks):
+            self.unwatch_names(node_id)
+        self.handles.clear()
+        self.cameras.clear()
+        self.startup.clear()
+        self.pending.clear()
+        it = om2.MItDependencyNodes(om2.MFn.kCamera)
+        while not it.isDone():
+            self.add(it.thisNode())
+            it.next()
+        self.resolve()
+
+    def is_startup(self, node_id, shape):
+        if node_id not in self.startup:
+            self.startup[node_id] = cmds.camera(shape, q=True, startupCamera=True)
+        return self.startup[node_id]
+
+    def get_instances(self, node_id, node):
+        paths = om2.MFnDagNode(node).getAllPaths()
+        if not len(paths) or self.is_startup(node_id, paths[0].fullPathName()):
+            return []
+
+        cameras = []
+        for index, path in enumerate(paths):
+            shape = path.fullPathName()
+            path.pop()
+            key = "{}:{}".format(node_id, index)
+            cameras.append(Camera(key, path.fullPathName(), shape, path.partialPathName()))
+        return cameras
+
+    def resolve(self):
+        for node_id in self.pending:
+            handle = self.handles.get(node_id)
+            if handle and handle.isValid():
+                self.cameras[node_id] = self.get_instances(node_id, handle.object())
+                if self.callbacks and self.cameras[node_id]:
+                    self.watch_names(node_id, handle.object())
+        self.pending.clear()
+        self.update_names()
+
+    def update_names(self):
+        self.items = [
+            camera for node_id in self.handles for camera in self.cameras.get(node_id, ())
+        ]
+        self.names = [camera.name for camera in self.items]
+
+    def get_cameras(self):
+        if self.pending:
+            self.resolve()
+        return self.names
+
+    def get_items(self):
+        if self.pending:
+            self.resolve()
+        return self.items
+
+
+class CameraListModel(QtCore.QAbstractListModel):
+    """The cameras of a CameraStrip, the view only asks for the visible rows."""
+
+    NAME_ROLE = QtCore.Qt.UserRole + 1
+
+    def __init__(self, ui, parent=None):
+        super(CameraListModel, self).__init__(parent)
+        self.ui = ui
+        self.cameras = []
+        self.icon = QtGui.QIcon(":Camera.png")
+
+    def set_cameras(self, cameras):
+        """Returns whether anything changed."""
+        if [c.key for c in cameras] != [c.key for c in self.cameras]:
+            self.beginResetModel()
+            self.cameras = list(cameras)
+            self.endResetModel()
+            return True
+
+        changed = False
+        for row, camera in enumerate(cameras):
+            if camera.name != self.cameras[row].name:
+                self.cameras[row] = camera
+                index = self.index(row)
+                self.dataChanged.emit(index, index)
+                changed = True
+        return changed
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.cameras)
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        camera = self.cameras[index.row()]
+        if role == QtCore.Qt.DisplayRole:
+            return self.ui.get_button_label(camera.name)[0]
+        if role == self.NAME_ROLE:
+            return camera.name
+        if role == QtCore.Qt.ToolTipRole:
+            return camera.transform
+        if role == QtCore.Qt.DecorationRole:
+            return self.icon
+        if role == QtCore.Qt.BackgroundRole:
+            # Painted often, only new cameras pick a color
+            if camera.key not in self.ui.camera_colors:
+                self.ui.camera_colors[camera.key] = self.ui.getcolor()
+            color = self.ui.camera_colors[camera.key]
+            return QtGui.QColor(*[int(c) for c in color])
+        if role == QtCore.Qt.ForegroundRole:
+            return QtGui.QColor(0, 0, 0)
+        if role == QtCore.Qt.SizeHintRole:
+            # Labels are cut to 10 characters, so every item fits the widest one
+            return QtCore.QSize(self.ui.__width__ * 9 + 34, self.ui.__height__)
+
+
+class CameraStrip(QtWidgets.QWidget):
+    """
+    Searchable alternative to the camera buttons, for scenes with hundreds of
+    cameras. A horizontal QListView only lays out and paints the cameras in
+    view. The filter box narrows it down as you type. Down moves into the list,
+    Enter looks through the current camera, or the first match from the box.
+    """
+
+    def __init__(self, ui, parent=None):
+        super(CameraStrip, self).__init__(parent)
+        self.ui = ui
+
+        self.filter_box = QtWidgets.QLineEdit()
+        self.filter_box.setPlaceholderText("Filter cameras")
+        self.filter_box.setClearButtonEnabled(True)
+        self.filter_box.setFixedWidth(110)
+        self.filter_box.installEventFilter(self)
+
+        self.model = CameraListModel(ui, self)
+        self.proxy = QtCore.QSortFilterProxyModel(self)
+        self.proxy.setSourceModel(self.model)
+        self.proxy.setFilterRole(CameraListModel.NAME_ROLE)
+        self.proxy.setFilterCaseSensitivity(QtCore.Qt.CaseInsensitive)
+
+        self.view = QtWidgets.QListView()
+        self.view.setModel(self.proxy)
+        self.view.setFlow(QtWidgets.QListView.LeftToRight)
+        self.view.setWrapping(False)
+        self.view.setUniformItemSizes(True)
+        self.view.setSpacing(1)
+        self.view.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.view.setHorizontalScrollMode(QtWidgets.QAbstractItemView.ScrollPerPixel)
+        self.view.setVerticalScrollBarPolicy(QtCore.Qt.ScrollBarAlwaysOff)
+        self.view.horizontalScrollBar().setStyleSheet("QScrollBar:horizontal {height: 6px;}")
+        self.view.setFixedHeight(ui.__height__ + 10)
+        self.view.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
+
+        layout = QtWidgets.QHBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.setSpacing(3)
+        layout.addWidget(self.filter_box)
+        layout.addWidget(self.view)
+
+        self.filter_box.textChanged.connect(self.filter)
+        self.filter_box.returnPressed.connect(self.activate_current)
+        self.view.clicked.connect(self.look_thru)
+        self.view.activated.connect(self.look_thru)
+        self.view.customContextMenuRequested.connect(self.show_context_menu)
+
+    def set_cameras(self, cameras):
+        return self.model.set_cameras(cameras)
+
+    def get_camera(self, index):
+        return self.proxy.data(index, CameraListModel.NAME_ROLE)
+
+    def look_thru(self, index):
+        self.ui.look_thru(self.get_camera(index))
+
+    def show_context_menu(self, pos):
+        index = self.view.indexAt(pos)
+        if index.isValid():
+            self.ui.show_context_menu(pos, self.get_camera(index), self.view.viewport())
+
+    def filter(self, text):
+        self.proxy.setFilterFixedString(text)
+        if self.proxy.rowCount():
+            self.view.setCurrentIndex(self.proxy.index(0, 0))
+
+    def activate_current(self):
+        index = self.view.currentIndex()
+        if not index.isValid() and self.proxy.rowCount():
+            index = self.proxy.index(0, 0)
+        if index.isValid():
+            self.look_thru(index)
+
+    def eventFilter(self, obj, event):
+        if (
+            obj is self.filter_box
+            and event.type() == QtCore.QEvent.KeyPress
+            and event.key() == QtCore.Qt.Key_Down
+        ):
+            self.view.setFocus()
+            return True
+        return False
+
+
 class UI(MayaQWidgetDockableMixin, QtWidgets.QDialog):
 
     TITLE = "Cams"
@@ -56,10 +350,17 @@ class UI(MayaQWidgetDockableMixin, QtWidgets.QDialog):
     """
     NO_INTERNET = "Could not establish a connection to the server."
 
+    # Relaunching deletes the previous window's control without a closeEvent,
+    # so its camera callbacks are removed here
+    dlg_instance = None
+
     def __init__(self, parent=None):
+        if self.__class__.dlg_instance is not None:
+            self.__class__.dlg_instance.stop_watching()
         delete_workspace_control(self.TITLE + "WorkspaceControl")
 
         super(self.__class__, self).__init__(parent=parent)
+        self.__class__.dlg_instance = self
         #self.setSizePolicy(QtWidgets.QSizePolicy.Fixed, QtWidgets.QSizePolicy.Fixed )
         self.mayaMainWindow = get_maya_win()
 
@@ -75,10 +376,29 @@ class UI(MayaQWidgetDockableMixin, QtWidgets.QDialog):
 
         self.get_prefs()
         self.process_prefs()
+        self.camera_list = self.user_prefs.get("camera_list", False)
+
+        # Bursts of camera changes, like loading a reference, reload the bar once
+        self.reload_timer = QtCore.QTimer(self)
+        self.reload_timer.setSingleShot(True)
+        self.reload_timer.setInterval(0)
+        self.reload_timer.timeout.connect(self.reload_cams_UI)
+
+        # Camera buttons and their colors by Camera key
+        self.camera_buttons = OrderedDict()
+        self.camera_colors = {}
+
+        self.camera_registry = CameraRegistry(
+            on_change=self.reload_timer.start, on_rename=self.rename_buttons
+        )
+        self.camera_registry.watch()
+        self.camera_registry.rebuild()
+        # Windows deleted without closing must not leave callbacks behind
+        self.destroyed.connect(self.camera_registry.unwatch)
 
         self.create_layouts()
         self.create_widgets()
-        self.create_buttons()
+        self.reload_cams_UI()
         self.create_connections()
 
         self.add_scriptJobs()
@@ -97,6 +417,9 @@ class UI(MayaQWidgetDockableMixin, QtWidgets.QDialog):
 
         menu_general = menu_bar.addMenu("General")
         self.reload_btn = menu_general.addAction("Reload UI")
+        self.camera_list_btn = menu_general.addAction("Searchable Camera List")
+        self.camera_list_btn.setCheckable(True)
+        self.camera_list_btn.setChecked(self.camera_list)
 
         menu_general.addSeparator().setText("Tools")
 
@@ -172,28 +495,89 @@ class UI(MayaQWidgetDockableMixin, QtWidgets.QDialog):
             self.line.hide()
 
         self.default_cam_layout.addLayout(self.cameras_layout)
+        self.camera_strip = CameraStrip(self)
+        self.camera_strip.setVisible(self.camera_list)
+        self.default_cam_layout.addWidget(self.camera_strip, 10)
         self.default_cam_layout.addStretch()
 
     def create_buttons(self):
+        """
+        Match the camera buttons to the cameras in the scene, adding, removing,
+        relabeling or moving only the buttons that changed.
+        Returns whether anything changed.
+        """
+        cameras = self.camera_registry.get_items()
+        self.non_startup_cameras = self.camera_registry.get_cameras()
+        current = set(camera.key for camera in cameras)
+        changed = False
+
+        for key in [key for key in self.camera_buttons if key not in current]:
+            button = self.camera_buttons.pop(key)
+            self.cameras_layout.removeWidget(button)
+            button.deleteLater()
+            changed = True
+
+        for index, camera in enumerate(cameras):
+            c = camera.name
+            button = self.camera_buttons.get(camera.key)
+            if button is None:
+                button = self.create_camera_button(camera.key, c)
+                self.camera_buttons[camera.key] = button
+                self.cameras_layout.insertWidget(index, button)
+                changed = True
+                continue
+            if button.camera != c:
+                self.set_button_label(button, c)
+                changed = True
+            if self.cameras_layout.indexOf(button) != index:
+                self.cameras_layout.removeWidget(button)
+                self.cameras_layout.insertWidget(index, button)
+                changed = True
+        return changed
+
+    def rename_buttons(self, cameras):
+        """Relabel the buttons of renamed cameras in place."""
+        self.non_startup_cameras = self.camera_registry.get_cameras()
+        if self.camera_list:
+            self.camera_strip.set_cameras(self.camera_registry.get_items())
+            return
+        for camera in cameras:
+            button = self.camera_buttons.get(camera.key)
+            if button is not None and button.camera != camera.name:
+                self.set_button_label(button, camera.name)
+
+    def clear_buttons(self):
+        for button in self.camera_buttons.values():
+            self.cameras_layout.removeWidget(button)
+            button.deleteLater()
+        self.camera_buttons.clear()
+
+    def set_camera_list(self, state):
+        self.camera_list = state
+        self.user_prefs["camera_list"] = state
+        self.save_prefs(cam_prefs=self.cams_prefs)
+
+        if state:
+            self.clear_buttons()
+        else:
+            self.camera_strip.set_cameras([])
+        self.camera_strip.setVisible(state)
+        self.reload_cams_UI()
+        self.adjustSize()
 
-        for c in self.get_cameras():
-            layout = QtWidgets.QHBoxLayout()
-
-            layout.setSpacing(1)
-            button = self.create_icon_button(c)
-            layout.addWidget(button)
-            # layout.addWidget(delete)
-            self.cameras_layout.addLayout(layout)
-
-            # Right-click menu for button
-            button.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
-            button.customContextMenuRequested.connect(
-                lambda pos, c=c, button=button: self.show_context_menu(pos, c, button)
-            )
+    def create_camera_button(self, key, c):
+        if key not in self.camera_colors:
+            self.camera_colors[key] = self.getcolor()
+        color = self.camera_colors[key]
+        button = self.create_icon_button(c, color)
 
-            # Connections for buttons
-            button.clicked.connect(partial(self.look_thru, c))
-            # delete.clicked.connect(lambda button=button: self.delete_cam(button.text()))
+        # Actions follow the button's current camera, which changes on renames
+        button.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
+        button.customContextMenuRequested.connect(
+            lambda pos, button=button: self.show_context_menu(pos, button.camera, button)
+        )
+        button.clicked.connect(lambda checked=False, button=button: self.look_thru(button.camera))
+        return button
 
     def create_connections(self):
 
@@ -202,7 +586,8 @@ class UI(MayaQWidgetDockableMixin, QtWidgets.QDialog):
         )
 
         self.settings_btn.triggered.connect(lambda: self.settings())
-        self.reload_btn.triggered.connect(self.reload_cams_UI)
+        self.reload_btn.triggered.connect(self.rescan_cams_UI)
+        self.camera_list_btn.toggled.connect(self.set_camera_list)
         self.multicams.triggered.connect(lambda: self.run_tools("multicams", py=False))
 
         self.reset_cams_data.triggered.connect(lambda: self.process_prefs(reset=True))
@@ -788,8 +1173,8 @@ class UI(MayaQWidgetDockableMixin, QtWidgets.QDialog):
 
         if result == QtWidgets.QDialog.Accepted:
             input = self.rename_window.textValue()
+            # The camera registry relabels the button
             cmds.rename(cam, input)
-            self.reload_cams_UI()
 
     def tear_off_cam(self, cam): 
         for panelName in cmds.getPanel(type="modelPanel"):
@@ -888,54 +1273,46 @@ class UI(MayaQWidgetDockableMixin, QtWidgets.QDialog):
                 except:
                     pass
 
-            # Delete cam from self.non_startup_cameras
-            button_index = [
-                i for i, c in enumerate(self.non_startup_cameras) if cam in c
-            ][0]
-            self.non_startup_cameras.pop(button_index)
-
-            # Delete cam
+            # Delete cam, the camera registry drops it on its own
             cmds.delete(cam)
             self.reload_cams_UI()
 
-    def clearLayout(self, layout):
-        if layout is not None:
-            while layout.count():
-                item = layout.takeAt(0)
-                widget = item.widget()
-                if widget is not None:
-                    widget.deleteLater()
-                elif isinstance(item, QtWidgets.QLayout):
-                    self.clearLayout(item)
-                    del item
-
-        try:
-            if not self.get_cameras():
-                self.line.hide()
-            else:
-                self.line.show()
-        except:
-            pass
-
     def reload_cams_UI(self):
-        self.clearLayout(self.cameras_layout)
-        self.create_buttons()
-        if self.get_cameras():
+        self.reload_timer.stop()
+        if self.camera_list:
+            self.non_startup_cameras = self.camera_registry.get_cameras()
+            changed = self.camera_strip.set_cameras(self.camera_registry.get_items())
+        else:
+            changed = self.create_buttons()
+        if not changed:
+            return
+        if self.non_startup_cameras:
             self.line.show()
         else:
             self.line.hide()
         self.adjustSize()
 
+    def rescan_cams_UI(self):
+        self.camera_registry.rebuild()
+        self.reload_cams_UI()
+
     def get_cameras(self):
         # Get all custom cameras in scene
-        self.non_startup_cameras = []
-        for cam in cmds.ls(type=("camera")):
-            kcam = cmds.listRelatives(cam, type='transform',p=True)[0]
-            if kcam not in ['persp', 'top', 'front', 'side']:
-                self.non_startup_cameras.append(kcam)
+        self.non_startup_cameras = self.camera_registry.get_cameras()
         return self.non_startup_cameras
 
-    def create_icon_button(self, camera):
+    def create_icon_button(self, camera, color=None):
+        button = QtWidgets.QPushButton()
+        button.setIcon(QtGui.QIcon(":Camera.png"))
+        button.setStyleSheet(
+            "color: rgb(0, 0, 0);background-color: rgb({})".format(
+                ",".join(color or self.getcolor())
+            )
+        )
+        self.set_button_label(button, camera)
+        return button
+
+    def get_button_label(self, camera):
         if len(camera) > 9:
             camera = camera[-8:]
             btn_name = '..' + camera
@@ -943,16 +1320,13 @@ class UI(MayaQWidgetDockableMixin, QtWidgets.QDialog):
         else:
             btn_name = camera
             btn_wdth = self.__width__*(len(camera)) + 30
+        return btn_name, btn_wdth
 
-        button = QtWidgets.QPushButton(btn_name)
-        button.setIcon(QtGui.QIcon(":Camera.png"))
-        button.setStyleSheet(
-            "color: rgb(0, 0, 0);background-color: rgb({})".format(
-                ",".join(self.getcolor())
-            )
-        )
+    def set_button_label(self, button, camera):
+        button.camera = camera
+        btn_name, btn_wdth = self.get_button_label(camera)
+        button.setText(btn_name)
         button.setFixedSize(btn_wdth, self.__height__)
-        return button
 
     def getcolor(self):
         return [str(int(random.uniform(200 * 0.7, 200 * 0.9))) for i in range(3)]
@@ -1095,7 +1469,16 @@ class UI(MayaQWidgetDockableMixin, QtWidgets.QDialog):
         aleha_credits.setFixedSize(400, 300)
         aleha_credits.exec_()
 
+    def stop_watching(self):
+        self.camera_registry.unwatch()
+        try:
+            self.reload_timer.stop()
+        except:
+            # Already deleted along with the window
+            pass
+
     def closeEvent(self, event):
+        self.stop_watching()
 
         try:
             # cmds.scriptJob(kill=self.script_job_id)
@@ -1108,19 +1491,10 @@ class UI(MayaQWidgetDockableMixin, QtWidgets.QDialog):
     def contextMenuEvent(self, event):
         event.ignore()
     
-    def cameraCreationCallback(self):
-        self.reload_cams_UI()
-        sel = cmds.ls(sl=1)
-        if sel:
-            sel = sel[0]
-            if cmds.nodeType(cmds.listRelatives(sel)) == 'camera':
-                cmds.scriptJob(nodeDeleted=[sel, self.reload_cams_UI], parent=self.__class__.TITLE)
-
     def add_scriptJobs(self):
-        for cam in self.non_startup_cameras:
-            cmds.scriptJob(nodeDeleted=[cam, self.reload_cams_UI], parent=self.__class__.TITLE)
-        cmds.scriptJob(event=["DagObjectCreated", self.cameraCreationCallback], parent=self.__class__.TITLE)
-        cmds.scriptJob(event=["SceneOpened", self.reload_cams_UI], parent=self.__class__.TITLE)
+        # Created and deleted cameras come from the camera registry
+        cmds.scriptJob(event=["SceneOpened", self.rescan_cams_UI], parent=self.__class__.TITLE)
+        cmds.scriptJob(event=["NewSceneOpened", self.rescan_cams_UI], parent=self.__class__.TITLE)
 
 
 """
@@ -17,8 +17,24 @@ spaceswitch.UI.show_dialog()
 from PySide2 import QtWidgets, QtGui, QtCore
 from shiboken2 import wrapInstance
 import maya.OpenMayaUI as omui, maya.OpenMaya as om
+import maya.api.OpenMaya as om2
 import maya.cmds as cmds, maya.mel as mel
-import base64, sys, colorsys, random, shiboken2
+import base64, sys, time, colorsys, random, shiboken2
+
+# The engine has no UI and can be used on its own, see spaceswitch_tools.core
+from aleha_tools.spaceswitch_tools.core import (
+    key_reduction,
+    enum_cache,
+    rig_index,
+    get_plug,
+    get_enum_attributes,
+    get_enum_options,
+    get_switch_frames,
+    get_batch_switches,
+    apply_switches,
+    BakeCancelled,
+    BakeProgress,
+)
 
 
 def get_python_version():
@@ -34,6 +50,58 @@ def get_maya_win():
     return main
 
 
+class ProgressBar(object):
+    """
+    Maya's main progress bar, updated at most once per interval seconds.
+    step() raises BakeCancelled once the user presses Esc.
+    on_update is called on every one of those updates.
+    """
+
+    def __init__(self, interval=0.1, on_update=None):
+        self.bar = mel.eval("$tmp = $gMainProgressBar")
+        self.interval = interval
+        self.on_update = on_update
+        self.status = ""
+        self.total = 0
+        self.count = 0
+        self.last_update = 0
+
+    def __enter__(self):
+        cmds.progressBar(self.bar, e=True, bp=True, isInterruptable=True)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        cmds.progressBar(self.bar, e=True, ep=True)
+        return False
+
+    def set_status(self, status, total):
+        self.status = status
+        self.total = max(total, 1)
+        self.count = 0
+        cmds.progressBar(
+            self.bar, e=True, max=self.total, progress=0, status=status + "..."
+        )
+        self.last_update = time.time()
+
+    def step(self, count=1):
+        self.count += count
+        now = time.time()
+        if now - self.last_update < self.interval:
+            return
+        self.last_update = now
+
+        if cmds.progressBar(self.bar, q=True, isCancelled=True):
+            raise BakeCancelled()
+        cmds.progressBar(
+            self.bar,
+            e=True,
+            progress=min(self.count, self.total),
+            status="{} ({}/{})...".format(self.status, self.count, self.total),
+        )
+        if self.on_update:
+            self.on_update()
+
+
 class UI(QtWidgets.QDialog):
     TITLE = "SpaceSwitch"
     VERSION = "0.0.93"
@@ -71,6 +139,23 @@ class UI(QtWidgets.QDialog):
         self.namespaces = False
         self.r_order = False
         self.selected_attr = None
+        self.bake_step = 1.0
+
+        self.enum_attr = ""
+        self.enum_plug = None
+        self.enum_value = None
+        self.callbacks = []
+        self.node_callback = None
+        self.sceneOpened = None
+        self.playbackChanged = None
+
+        # Selection changes are merged into one refresh per idle tick
+        self.pending_refresh = False
+        self.playing = False
+        self.refresh_timer = QtCore.QTimer(self)
+        self.refresh_timer.setSingleShot(True)
+        self.refresh_timer.setInterval(0)
+        self.refresh_timer.timeout.connect(self.run_scheduled_refresh)
 
         self.create_layouts()
         self.create_widgets()
@@ -96,6 +181,35 @@ class UI(QtWidgets.QDialog):
         self.all_frames = settings_menu.addAction("Apply to all frames")
         self.all_frames.setCheckable(True)
 
+        self.bake_frames = settings_menu.addAction("Bake every frame")
+        self.bake_frames.setCheckable(True)
+        self.bake_frames.setToolTip(
+            "Bake between the first and last key instead of only on keys."
+        )
+
+        bake_step_menu = settings_menu.addMenu("Bake step")
+        bake_step_group = QtWidgets.QActionGroup(self)
+        for label, step in (("1", 1.0), ("1/2", 0.5), ("1/4", 0.25)):
+            action = bake_step_menu.addAction(label)
+            action.setCheckable(True)
+            action.setChecked(step == self.bake_step)
+            action.triggered.connect(
+                lambda checked=False, step=step: self.set_bake_step(step)
+            )
+            bake_step_group.addAction(action)
+
+        self.reduce_keys = settings_menu.addAction("Reduce baked keys")
+        self.reduce_keys.setCheckable(True)
+        self.reduce_keys.setChecked(key_reduction is not None)
+        self.reduce_keys.setEnabled(key_reduction is not None)
+
+        rig_menu = menu_bar.addMenu("Rig")
+        self.controls_menu = rig_menu.addMenu("Switchable controls")
+        self.rescan_rig = rig_menu.addAction("Rescan rig")
+        self.rescan_rig.setToolTip(
+            "Index the switchable controls of the selected rig again."
+        )
+
         menu_extra = menu_bar.addMenu("Extra")
         self.updates = menu_extra.addAction("Check for updates")
         menu_extra.addSeparator()
@@ -154,24 +268,78 @@ class UI(QtWidgets.QDialog):
         )
         self.attribute_btn.clicked.connect(self.select_attr)
         self.apply_btn.clicked.connect(self.apply_changes)
+        self.controls_menu.aboutToShow.connect(self.fill_controls_menu)
+        self.rescan_rig.triggered.connect(lambda: self.fill_controls_menu(rescan=True))
         self.updates.triggered.connect(self.check_for_updates)
         self.credits.triggered.connect(self.coffee)
 
     def add_scriptJobs(self):
-        '''# Add a callback for the Maya SceneOpened event 
-        self.sceneOpened = om.MSceneMessage.addCallback(
-            om.MSceneMessage.kAfterOpen, self.on_scene_opened
-        )
-        self.SelectionChanged = om.MEventMessage.addEventCallback(
-            "SelectionChanged", self.refresh
-        )
-        self.timeChanged = om.MEventMessage.addEventCallback(
-            "timeChanged", self.refresh
-        )'''
-
+        # Relaunching the tool or applying again must not stack jobs
+        self.remove_scriptJobs()
+        self.playing = cmds.play(q=True, state=True)
         self.sceneOpened = cmds.scriptJob( e = ["NewSceneOpened", self.on_scene_opened] )
-        self.SelectionChanged = cmds.scriptJob( e = ["SelectionChanged", self.refresh] )
-        self.timeChanged = cmds.scriptJob( e = ["timeChanged", lambda: self.refresh(timeChange = True)] )
+        self.playbackChanged = cmds.scriptJob( conditionChange = ["playingBack", self.playback_changed] )
+
+        # Only the selected control is watched, see watch_selection
+        self.callbacks = [
+            om2.MEventMessage.addEventCallback("SelectionChanged", self.selection_changed),
+            om2.MDGMessage.addTimeChangeCallback(self.time_changed),
+        ]
+        self.node_callback = None
+        self.watch_selection()
+
+    def watch_selection(self):
+        if self.node_callback is not None:
+            om2.MMessage.removeCallback(self.node_callback)
+            self.node_callback = None
+        sel = om2.MGlobal.getActiveSelectionList()
+        if sel.length():
+            self.node_callback = om2.MNodeMessage.addAttributeChangedCallback(
+                sel.getDependNode(0), self.attribute_changed
+            )
+
+    def selection_changed(self, *args):
+        self.watch_selection()
+        self.schedule_refresh()
+
+    def attribute_changed(self, msg, plug, other_plug, *args):
+        if self.enum_plug is not None and plug == self.enum_plug:
+            self.update_enum_value()
+
+    def time_changed(self, *args):
+        # Reads the watched enum only, the dropdown changes with its value
+        if not self.playing:
+            self.update_enum_value()
+
+    def update_enum_value(self):
+        if self.enum_plug is None:
+            return
+        try:
+            value = self.enum_plug.asInt()
+        except:
+            return
+        if value != self.enum_value:
+            self.enum_value = value
+            self.combobox.setCurrentIndex(self.combobox.findData(value))
+
+    def schedule_refresh(self, *args):
+        self.pending_refresh = True
+        # While playing back, the refresh waits for playback to stop
+        if not self.playing:
+            self.refresh_timer.start()
+
+    def run_scheduled_refresh(self):
+        if not self.pending_refresh or self.playing:
+            return
+        self.pending_refresh = False
+        self.refresh()
+
+    def playback_changed(self):
+        self.playing = cmds.play(q=True, state=True)
+        if not self.playing:
+            self.update_enum_value()
+            if self.pending_refresh:
+                self.refresh_timer.start()
 
 
     def set_namespaces(self):
@@ -182,12 +350,16 @@ class UI(QtWidgets.QDialog):
         self.r_order = self.rotate_order.isChecked()
         self.refresh()
 
+    def set_bake_step(self, step):
+        self.bake_step = step
+
     def getSelectedObj(self):
         return cmds.ls(selection=True)
 
-    def refresh(self, timeChange = False, *args):
+    def refresh(self, *args):
         try:
             self.enum_attr = ""
+            self.enum_plug = None
             sel = self.getSelectedObj()
             no_selection = "No selection."
             no_target = "No target object selected."
@@ -210,27 +382,23 @@ class UI(QtWidgets.QDialog):
                         QtCore.Qt.AlignLeft | QtCore.Qt.AlignVCenter
                     )
                 self.attribute_btn.hide()
-                if len(self.getEnum()) > 0:
+                enum_attributes = self.getEnum()
+                if len(enum_attributes) > 0:
                     self.apply_btn.setEnabled(True)
                     self.combobox.setEnabled(True)
                     self.combobox.clear()
-                    if len(self.getEnum()) == 1:
-                        self.set_combobox(sel[0], self.getEnum()[0])
-                    elif len(self.getEnum()) > 1:
-                        if not timeChange:
-                            self.selected_attr = None
-                        if self.selected_attr:
-                            self.set_combobox(sel[0], self.selected_attr)
-                        else:
-                            self.attribute_btn.show()
-                            self.combobox.addItems(self.getEnum())
-                            self.apply_btn.setEnabled(False)
-                            if not timeChange:
-                                cmds.inViewMessage(
-                                    amg="Choose the attribute to use from the <hl>dropdown menu</hl>.",
-                                    pos="midCenterBot",
-                                    fade=True,
-                                )
+                    if len(enum_attributes) == 1:
+                        self.set_combobox(sel[0], enum_attributes[0])
+                    elif len(enum_attributes) > 1:
+                        self.selected_attr = None
+                        self.attribute_btn.show()
+                        self.combobox.addItems(enum_attributes)
+                        self.apply_btn.setEnabled(False)
+                        cmds.inViewMessage(
+                            amg="Choose the attribute to use from the <hl>dropdown menu</hl>.",
+                            pos="midCenterBot",
+                            fade=True,
+                        )
                 else:
                     self.apply_btn.setEnabled(False)
                     self.combobox.setEnabled(False)
@@ -274,27 +442,7 @@ class UI(QtWidgets.QDialog):
             pass
 
     def getEnum(self):
-        sel = self.getSelectedObj()[0]
-        enum_attributes = []
-        locked = cmds.listAttr(sel, cb=1) or []
-        orderedAttrs = [
-            i.rsplit(".", 1)[-1] for i in cmds.listAnimatable(sel) if i not in locked
-        ]
-        if orderedAttrs:
-            if self.r_order:
-                orderedAttrs.extend(["rotateOrder"])
-            for i in orderedAttrs:
-                try:
-                    attrType = cmds.attributeQuery(i, node=sel, attributeType=True)
-                except:
-                    continue
-                if attrType == "enum":
-                    enum_values = cmds.attributeQuery(i, node=sel, listEnum=True)[
-                        0
-                    ].split(":")
-                    if any(c.isalnum() for c in enum_values):
-                        enum_attributes.append(i)
-
+        enum_attributes = get_enum_attributes(self.getSelectedObj()[0], self.r_order)
         if enum_attributes:
             self.apply_btn.setEnabled(True)
         else:
@@ -310,16 +458,14 @@ class UI(QtWidgets.QDialog):
 
     def set_combobox(self, sel, enum_attr):
         self.enum_attr = enum_attr
-        enumOptions = cmds.attributeQuery(enum_attr, node=sel, listEnum=True)[0].split(
-            ":"
-        )
-        currentValue = cmds.getAttr(
-            ("{}.{}").format(sel, enum_attr), time=cmds.currentTime(q=1)
-        )
+        enumOptions = get_enum_options(sel, enum_attr)
+        self.enum_plug = get_plug(sel, enum_attr)
+        currentValue = self.enum_value = self.enum_plug.asInt()
         self.combobox.clear()
-        for i, op in enumerate(enumOptions):
-            self.combobox.addItem(op)
-            if i == currentValue:
+        # Items keep the enum value, fields can have explicit values
+        for i, (op, value) in enumerate(enumOptions):
+            self.combobox.addItem(op, value)
+            if value == currentValue:
                 self.combobox.setCurrentIndex(i)
 
     def show_hide_target(self, button_triggered=False):
@@ -350,121 +496,117 @@ class UI(QtWidgets.QDialog):
             self.target_fold.setIcon(QtGui.QIcon(":arrowDown.png"))
 
 
-    def apply_changes(self):
+    def fill_controls_menu(self, rescan=False):
+        self.controls_menu.clear()
         sel = self.getSelectedObj()
-        too_many_objects = "Too many objects selected!"
-        index = self.combobox.currentIndex()
-
-        def do_xform(target, all_xform=False):
-            if all_xform:
-                xform = all_xform
-            else:
-                xform = cmds.xform(target, q=True, ws=True, matrix=True)
-            cmds.setAttr(("{}.{}").format(sel[0], self.enum_attr), index)
-            cmds.xform(target, ws=True, matrix=xform)
-
-        def multiple_frames(keyframes):
-            marker_widget = None
-            cmds.undoInfo(openChunk=True)
-            self.remove_scriptJobs()
+        controls = []
+        if sel:
+            if rescan:
+                rig_index.get_rig(sel[0], rescan=True)
+                enum_cache.clear()
+            controls = rig_index.switchable_controls(sel[0])
+        if not controls:
+            no_rig = self.controls_menu.addAction("Select a control of a referenced rig.")
+            no_rig.setEnabled(False)
+            return
+        for control, attributes in controls:
+            action = self.controls_menu.addAction(control)
+            action.setToolTip(", ".join(attributes))
+            action.triggered.connect(
+                lambda checked=False, control=control: cmds.select(control)
+            )
 
-            try:
-                cmds.refresh(suspend=True)
-
-                # Color timeline
-                timerange = [keyframes[0], keyframes[-1] +1]
-                if cmds.timeControl("timeControl1", q=1, rv=1):
-                    timerange = [int(f) for f in cmds.timeControl("timeControl1", ra=1, q=True)]
-
-                if int(cmds.about(v=1)) >= 2024:
-                    cmds.playbackOptions( sv=False )
-
-                timeline_wgt = TimelineMarker().get_timeline()
-                marker_widget = TimelineMarker(timerange, parent=timeline_wgt)
-                marker_widget.setGeometry(timeline_wgt.rect())
-                marker_widget.show()
-                
-                # Start Progress Bar
-                gMainProgressBar = mel.eval("$tmp = $gMainProgressBar")
-                bar_value = 1
-                max_bar_value = len(keyframes)
-                cmds.progressBar(gMainProgressBar, e=True, bp=True, max=max_bar_value)
-
-                list_xform = []
-                current_time = cmds.currentTime(q=True)
-                for frame in keyframes:
-                    cmds.currentTime(frame)
-                    list_xform.append(cmds.xform(target, q=True, ws=True, matrix=True))
-                    cmds.progressBar(
-                        gMainProgressBar,
-                        edit=True,
-                        status="Saving Positions (%s/%s)..."
-                        % (bar_value, max_bar_value),
-                        step=1,
-                    )
-                    bar_value += 1
-                bar_value = 1
-                cmds.progressBar(gMainProgressBar, e=True, ep=True)
-                cmds.progressBar(gMainProgressBar, e=True, bp=True, max=max_bar_value)
-                for i, frame in enumerate(keyframes):
-                    cmds.currentTime(frame)
-                    do_xform(target, list_xform[i])
-                    cmds.progressBar(
-                        gMainProgressBar,
-                        edit=True,
-                        status="Applying Positions (%s/%s)..."
-                        % (bar_value, max_bar_value),
-                        step=1,
-                    )
-                    bar_value += 1
-
-                cmds.currentTime(current_time)
-                cmds.progressBar(gMainProgressBar, e=True, ep=True)
-            finally:
-                cmds.refresh(suspend=False)
-                cmds.undoInfo(closeChunk=True)
-                self.add_scriptJobs()
-                
-            if marker_widget:
-                marker_widget.delete_marker()
-                marker_widget = None
+    def get_switch_frames(self, target):
+        """
+        Frames a switch on target is baked on: its keys inside the timeline
+        selection, or all of them with "Apply to all frames". With "Bake every
+        frame", every step between the first and last of those keys.
+        Returns None when only the current frame should change, and an empty
+        list when the timeline selection holds no keys.
+        """
+        frame_range = None
+        if cmds.timeControl("timeControl1", rv=1, q=True):
+            frame_range = cmds.timeControl("timeControl1", q=1, ra=1)
+        return get_switch_frames(
+            target,
+            frame_range,
+            all_keys=self.all_frames.isChecked(),
+            every_frame=self.bake_frames.isChecked(),
+            step=self.bake_step,
+        )
 
-        # Check selection length to determinate the target.
-        if len(sel) == 2:
-            target = sel[1]
-        elif len(sel) == 1:
-            target = sel[0]
-        elif len(sel) > 2:
-            cmds.warning(too_many_objects)
+    def get_batch_switches(self, sel):
+        # Every selected control switches to the option with the same name
+        option = self.combobox.currentText()
+        switches, skipped = get_batch_switches(
+            sel, option, self.enum_attr, self.r_order
+        )
+        if skipped:
+            cmds.warning(
+                "No '{}' space found on: {}".format(option, ", ".join(skipped))
+            )
+        return switches
+
+    def apply_changes(self):
+        sel = self.getSelectedObj()
+        if not sel:
             return
 
-        try:
-            keyframes = sorted(set(cmds.keyframe(target, query=True)))
-        except:
-            keyframes = None
-        # Check if there is a timeline selection.
-        timeline = cmds.timeControl("timeControl1", q=1, ra=1)
-
-        if keyframes:
-            if cmds.timeControl("timeControl1", rv=1, q=True):
-                keyframes = sorted(
-                    frame for frame in keyframes if timeline[0] <= frame <= timeline[1]
+        # Two objects switch the first one and keep the second in place,
+        # more than two are switched together, each keeping itself in place.
+        if len(sel) > 2:
+            switches = self.get_batch_switches(sel)
+        else:
+            switches = [(sel[0], self.enum_attr, self.combobox.currentData(), sel[-1])]
+        switches = [entry + (self.get_switch_frames(entry[3]),) for entry in switches]
+
+        report = self.bake_switches(
+            switches,
+            reduce=self.bake_frames.isChecked() and self.reduce_keys.isChecked(),
+        )
+        if report["cancelled"]:
+            cmds.warning("SpaceSwitch cancelled.")
+        skipped = [
+            entry["target"] for entry in report["switches"] if entry["mode"] == "skipped"
+        ]
+        if skipped:
+            cmds.warning(
+                "No keys in the selected range, not switched: {}".format(
+                    ", ".join(skipped)
                 )
-                if len(keyframes) < 2:
-                    cmds.currentTime(keyframes[0])
-                    do_xform(target)
-                else:
-                    multiple_frames(keyframes)
+            )
 
-            elif not self.all_frames.isChecked():
-                do_xform(target)
-            else:
-                if len(keyframes) == 1:
-                    do_xform(target)
-                else:
-                    multiple_frames(keyframes)
-        else:
-            do_xform(target)
+    def bake_switches(self, switches, reduce=False):
+        baked = [entry for entry in switches if entry[4]]
+        if not baked:
+            return apply_switches(switches)
+
+        marker_widget = None
+        self.remove_scriptJobs()
+        try:
+            # Color timeline
+            all_frames = [frame for entry in baked for frame in entry[4]]
+            timerange = [min(all_frames), max(all_frames) + 1]
+            if cmds.timeControl("timeControl1", q=1, rv=1):
+                timerange = [int(f) for f in cmds.timeControl("timeControl1", ra=1, q=True)]
+
+            if int(cmds.about(v=1)) >= 2024:
+                cmds.playbackOptions( sv=False )
+
+            progress = BakeProgress(all_frames)
+            timeline_wgt = TimelineMarker.get_timeline()
+            marker_widget = TimelineMarker(timerange, progress, parent=timeline_wgt)
+            marker_widget.setGeometry(timeline_wgt.rect())
+            marker_widget.show()
+
+            with ProgressBar(on_update=marker_widget.update_progress) as progress_bar:
+                progress.listener = progress_bar
+                return apply_switches(switches, progress=progress, reduce=reduce)
+        finally:
+            self.add_scriptJobs()
+            if marker_widget:
+                marker_widget.delete_marker()
+                marker_widget = None
 
     # Check for Updates
     def check_for_updates(self, warning=True, *args):
@@ -565,42 +707,64 @@ class UI(QtWidgets.QDialog):
         # Close the dialog when a new scene is opened in Maya to avoid callback errors
         self.close()
         self.remove_scriptJobs()
+        enum_cache.clear()
+        rig_index.clear()
 
     def remove_scriptJobs(self):
-        '''try:
-            om.MSceneMessage.removeCallback(self.sceneOpened)
-        except:
-            pass
-        try:
-            om.MMessage.removeCallback(self.SelectionChanged)
-        except:
-            pass
+        callbacks = self.callbacks
+        if self.node_callback is not None:
+            callbacks = callbacks + [self.node_callback]
+        self.callbacks, self.node_callback = [], None
         try:
-            om.MMessage.removeCallback(self.timeChanged)
-        except:
-            pass'''
-        try:
-            cmds.scriptJob( kill = self.sceneOpened, force=True)
-        except:
-            pass
-        try:
-            cmds.scriptJob( kill = self.SelectionChanged, force=True)
-        except:
-            pass
-        try:
-            cmds.scriptJob( kill = self.timeChanged, force=True)
+            om2.MMessage.removeCallbacks(callbacks)
         except:
             pass
+        for job in (self.sceneOpened, self.playbackChanged):
+            if job is None:
+                continue
+            try:
+                cmds.scriptJob( kill = job, force=True)
+            except:
+                pass
+        self.sceneOpened = self.playbackChanged = None
 
     def closeEvent(self, event):
         self.remove_scriptJobs()
+        self.refresh_timer.stop()
+        enum_cache.clear()
+        rig_index.clear()
         event.accept()
 
 
 class TimelineMarker(QtWidgets.QWidget):
-    def __init__(self, timerange=None, parent=None):
+    """
+    Colors the bake range on the timeline. With a BakeProgress, the frames
+    already applied, captured and still remaining get their own colors, and
+    only the stretch that changed is repainted.
+    """
+
+    COLOR = QtGui.QColor(200, 120, 200, 70)
+    CAPTURED_COLOR = QtGui.QColor(120, 160, 230, 90)
+    APPLIED_COLOR = QtGui.QColor(110, 200, 130, 110)
+
+    def __init__(self, timerange=None, progress=None, parent=None):
         super(TimelineMarker, self).__init__(parent)
         self.timerange = timerange
+        self.progress = progress
+        self.playback_range = None
+        self.marker_rect = QtCore.QRect()
+        self.captured_x = self.applied_x = 0
+        self.range_callback = None
+
+        if timerange:
+            self.setAttribute(QtCore.Qt.WA_TransparentForMouseEvents)
+            self.update_range()
+            # Playback range and timeline size are cached, only re-read them when they change
+            self.range_callback = om2.MEventMessage.addEventCallback(
+                "playbackRangeChanged", lambda *args: self.update_range()
+            )
+            if parent:
+                parent.installEventFilter(self)
 
     @staticmethod
     def get_timeline():
@@ -609,33 +773,96 @@ class TimelineMarker(QtWidgets.QWidget):
         if ptr:
             return shiboken2.wrapInstance(int(ptr), QtWidgets.QWidget)
 
-    def paintEvent(self, event):
-
-        start = cmds.playbackOptions(q=True, minTime=True)
-        end = cmds.playbackOptions(q=True, maxTime=True)
+    def update_range(self):
+        playback_range = (
+            cmds.playbackOptions(q=True, minTime=True),
+            cmds.playbackOptions(q=True, maxTime=True),
+        )
+        if playback_range != self.playback_range:
+            self.playback_range = playback_range
+            self.update_geometry()
 
+    def frame_to_x(self, frame):
+        start, end = self.playback_range
         total_width = self.width()
         step = (total_width - (total_width * 0.01)) / (end - start + 1)
-        painter = QtGui.QPainter(self)
-        pen = QtGui.QPen()
-        pen.setWidth(step + step * 0.005)
+        return (frame - start) * step + (total_width * 0.005)
 
+    def update_geometry(self):
         sframe, eframe = self.timerange
-        eframe -= 1
+        rect = QtCore.QRectF(
+            QtCore.QPointF(self.frame_to_x(sframe), 0),
+            QtCore.QPointF(self.frame_to_x(eframe), self.height()),
+        ).toAlignedRect()
+        if rect != self.marker_rect:
+            self.update(self.marker_rect.united(rect))
+            self.marker_rect = rect
+        self.captured_x, self.applied_x = self.get_progress_x()
+
+    def get_progress_x(self):
+        """Pixel where the captured and the applied frames end."""
+        if not self.progress:
+            return self.marker_rect.left(), self.marker_rect.left()
+
+        frames = self.progress.frames
+
+        def to_x(count):
+            if count >= len(frames):
+                return self.marker_rect.right() + 1
+            return max(int(round(self.frame_to_x(frames[count]))), self.marker_rect.left())
+
+        return to_x(self.progress.captured), to_x(self.progress.applied)
+
+    def update_progress(self):
+        captured_x, applied_x = self.get_progress_x()
+        dirty = QtCore.QRect()
+        for old, new in ((self.captured_x, captured_x), (self.applied_x, applied_x)):
+            if old != new:
+                dirty = dirty.united(
+                    QtCore.QRect(min(old, new), 0, abs(new - old), self.height())
+                )
+        self.captured_x, self.applied_x = captured_x, applied_x
+        if not dirty.isEmpty():
+            # Nothing else gets the event loop during a bake, paint right away
+            self.repaint(dirty)
 
-        color_ = QtGui.QColor(200, 120, 200, 70)
-        pen.setColor(color_)
-        pos_start = (sframe - start) * step + (total_width * 0.005)
-        pos_end = (eframe + 1 - start) * step + (total_width * 0.005)
-        rect = QtCore.QRectF(QtCore.QPointF(pos_start, 0), QtCore.QPointF(pos_end, self.height()))
-        painter.setPen(pen)
-        painter.fillRect(rect, QtGui.QBrush(color_))  # Fill the rectangle with the color
+    def eventFilter(self, obj, event):
+        if obj is self.parent() and event.type() == QtCore.QEvent.Resize:
+            self.setGeometry(obj.rect())
+        return False
 
+    def resizeEvent(self, event):
+        super(TimelineMarker, self).resizeEvent(event)
+        if self.playback_range:
+            self.update_geometry()
+
+    def paintEvent(self, event):
+        rect = self.marker_rect.intersected(event.rect())
+        if rect.isEmpty():
+            return
+        left, right = self.marker_rect.left(), self.marker_rect.right() + 1
+        painter = QtGui.QPainter(self)
+        for start, end, color in (
+            (left, self.applied_x, self.APPLIED_COLOR),
+            (self.applied_x, self.captured_x, self.CAPTURED_COLOR),
+            (self.captured_x, right, self.COLOR),
+        ):
+            segment = QtCore.QRect(start, 0, end - start, self.height()).intersected(rect)
+            if not segment.isEmpty():
+                painter.fillRect(segment, color)
+        painter.end()
 
     def delete_marker(self):
+        if self.range_callback is not None:
+            try:
+                om2.MMessage.removeCallback(self.range_callback)
+            except:
+                pass
+            self.range_callback = None
         try:
+            if self.parent():
+                self.parent().removeEventFilter(self)
             self.setParent(None)
-            QtGui.QPainter(self).end()
         except:
             pass
 
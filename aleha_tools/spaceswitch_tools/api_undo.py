@@ -0,0 +1,59 @@
+"""
+Command plugin that puts edits made through the Maya API on the undo queue.
+
+API edits made from a script are not recorded by Maya. register() loads this
+file as a plugin and calls its command once per operation, so an operation
+that has already been applied becomes a single undo step.
+"""
+
+import os
+
+import maya.api.OpenMaya as om2
+import maya.cmds as cmds
+
+
+PLUGIN = "api_undo"
+COMMAND = "spaceSwitchApiUndo"
+
+# Operations waiting for their command, shared with the plugin through this module
+pending = []
+
+
+def maya_useNewAPI():
+    pass
+
+
+class ApiUndoCommand(om2.MPxCommand):
+    def doIt(self, args):
+        # Maya loads the plugin under its own module name, read the package one
+        from aleha_tools.spaceswitch_tools import api_undo
+
+        self.operation = api_undo.pending.pop()
+
+    def undoIt(self):
+        self.operation.undoIt()
+
+    def redoIt(self):
+        self.operation.redoIt()
+
+    def isUndoable(self):
+        return True
+
+
+def initializePlugin(plugin):
+    om2.MFnPlugin(plugin).registerCommand(COMMAND, ApiUndoCommand)
+
+
+def uninitializePlugin(plugin):
+    om2.MFnPlugin(plugin).deregisterCommand(COMMAND)
+
+
+def register(operation):
+    """
+    Record an already applied operation as one undo step.
+    The operation needs undoIt() and redoIt() methods.
+    """
+    if not cmds.pluginInfo(PLUGIN, q=True, loaded=True):
+        cmds.loadPlugin(os.path.splitext(__file__)[0] + ".py", quiet=True)
+    pending.append(operation)
+    getattr(cmds, COMMAND)()
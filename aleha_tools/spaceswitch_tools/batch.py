@@ -0,0 +1,310 @@
+"""
+Run SpaceSwitch over many scene files with a pool of mayapy workers.
+
+Every scene is opened by its own worker process, switched with
+core.switch and saved. Results and timings are collected into a report.
+
+python batch.py shot010.ma shot020.ma --switch "rig:hand_ctrl.space=world" \
+    --all-keys --workers 4 --mayapy "C:/Program Files/Autodesk/Maya2024/bin/mayapy.exe" \
+    --report report.json
+
+Switches can also come from a JSON file (--specs) holding a list of
+core.switch keyword arguments. --stand-in runs workers that follow the same
+protocol without Maya, to try a batch locally.
+"""
+
+from __future__ import print_function
+
+import argparse
+import json
+import os
+import shlex
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from multiprocessing.pool import ThreadPool
+
+
+# Folder holding the aleha_tools package, given to the workers' PYTHONPATH
+PACKAGE_ROOT = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+
+
+def parse_switch(text):
+    """'control.attr=value' to core.switch keyword arguments."""
+    plug, _, value = text.partition("=")
+    control, _, attr = plug.rpartition(".")
+    if not (control and attr and value):
+        raise argparse.ArgumentTypeError(
+            "Switches look like control.attr=value, not '{}'".format(text)
+        )
+    try:
+        value = int(value)
+    except ValueError:
+        pass
+    return {"control": control, "attr": attr, "value": value}
+
+
+def build_jobs(scenes, switches, output_dir=None, job_dir=None):
+    jobs = []
+    for i, scene in enumerate(scenes):
+        scene = os.path.abspath(scene)
+        output = scene
+        if output_dir:
+            output = os.path.join(os.path.abspath(output_dir), os.path.basename(scene))
+        job = {
+            "scene": scene,
+            "output": output,
+            "switches": switches,
+            "result": os.path.join(job_dir, "result_{}.json".format(i)),
+        }
+        job["path"] = os.path.join(job_dir, "job_{}.json".format(i))
+        with open(job["path"], "w") as job_file:
+            json.dump(job, job_file)
+        jobs.append(job)
+    return jobs
+
+
+def run_job(job, command, timeout=None):
+    """Run one worker on a job and return its report entry."""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        [PACKAGE_ROOT] + [p for p in [env.get("PYTHONPATH")] if p]
+    )
+    entry = {"scene": job["scene"], "output": job["output"], "ok": False}
+    start = time.time()
+    try:
+        process = subprocess.Popen(
+            command + [job["path"]],
+            env=env,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+        )
+    except OSError as e:
+        entry["error"] = "Could not start {}: {}".format(command[0], e)
+        entry["seconds"] = 0.0
+        return entry
+
+    # communicate(timeout=) is Python 3 only, a timer kills stuck workers
+    timed_out = []
+
+    def kill():
+        timed_out.append(True)
+        try:
+            process.kill()
+        except OSError:
+            pass
+
+    timer = threading.Timer(timeout, kill) if timeout else None
+    if timer:
+        timer.daemon = True
+        timer.start()
+    try:
+        output = process.communicate()[0]
+    except Exception as e:
+        kill()
+        process.wait()
+        entry["error"] = str(e) or e.__class__.__name__
+        entry["seconds"] = time.time() - start
+        return entry
+    finally:
+        if timer:
+            timer.cancel()
+    entry["seconds"] = time.time() - start
+    if timed_out:
+        entry["error"] = "Timed out after {:g}s".format(timeout)
+        return entry
+
+    try:
+        with open(job["result"], "r") as result_file:
+            entry.update(json.load(result_file))
+    except (IOError, OSError, ValueError):
+        # The worker died before writing its result, keep the end of its log
+        log = output.decode("utf-8", "replace").strip().splitlines()
+        entry["error"] = "Worker exited with code {}: {}".format(
+            process.returncode, "\n".join(log[-10:])
+        )
+    return entry
+
+
+def run_batch(jobs, command, workers=2, timeout=None, log=None):
+    pool = ThreadPool(max(1, workers))
+    report = []
+    try:
+        for entry in pool.imap_unordered(
+            lambda job: run_job(job, command, timeout), jobs
+        ):
+            report.append(entry)
+            if log:
+                log(
+                    "[{}/{}] {} {} ({:.1f}s)".format(
+                        len(report),
+                        len(jobs),
+                        "OK  " if entry["ok"] else "FAIL",
+                        entry["scene"],
+                        entry["seconds"],
+                    )
+                )
+    finally:
+        pool.close()
+        pool.join()
+    return sorted(report, key=lambda entry: entry["scene"])
+
+
+def write_result(job, result):
+    with open(job["result"], "w") as result_file:
+        json.dump(result, result_file)
+
+
+def worker(job_path):
+    """Worker entry point, runs inside mayapy."""
+    with open(job_path, "r") as job_file:
+        job = json.load(job_file)
+
+    import maya.standalone
+
+    maya.standalone.initialize(name="python")
+    try:
+        import maya.cmds as cmds
+        from aleha_tools.spaceswitch_tools import core
+
+        cmds.file(job["scene"], open=True, force=True, prompt=False)
+        switches = [core.switch(**spec) for spec in job["switches"]]
+        if job["output"] != job["scene"]:
+            cmds.file(rename=job["output"])
+        cmds.file(save=True, force=True)
+        write_result(job, {"ok": True, "switches": switches})
+    except Exception as e:
+        write_result(job, {"ok": False, "error": str(e) or e.__class__.__name__})
+    finally:
+        maya.standalone.uninitialize()
+
+
+def stand_in_worker(job_path):
+    """Follows the worker protocol without Maya: reports and copies only."""
+    with open(job_path, "r") as job_file:
+        job = json.load(job_file)
+    if not os.path.isfile(job["scene"]):
+        write_result(job, {"ok": False, "error": "No such scene: " + job["scene"]})
+        return
+    if job["output"] != job["scene"]:
+        shutil.copyfile(job["scene"], job["output"])
+    switches = [
+        {
+            "switches": [dict(spec, target=spec.get("target") or spec["control"], mode="stand-in")],
+            "cancelled": False,
+            "seconds": 0.0,
+        }
+        for spec in job["switches"]
+    ]
+    write_result(job, {"ok": True, "switches": switches})
+
+
+def print_report(report, log=print):
+    failed = [entry for entry in report if not entry["ok"]]
+    total = sum(entry["seconds"] for entry in report)
+    log(
+        "{} scenes, {} switched, {} failed, {:.1f}s of worker time".format(
+            len(report), len(report) - len(failed), len(failed), total
+        )
+    )
+    for entry in failed:
+        log("  {}: {}".format(entry["scene"], entry.get("error")))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Switch SpaceSwitch controls in many scene files."
+    )
+    parser.add_argument("scenes", nargs="+", help="Scene files to switch.")
+    parser.add_argument(
+        "--switch",
+        type=parse_switch,
+        action="append",
+        default=[],
+        help="control.attr=value, value being an enum value or field name.",
+    )
+    parser.add_argument("--specs", help="JSON file with a list of core.switch arguments.")
+    parser.add_argument("--target", help="Keep this object in place instead.")
+    parser.add_argument("--frame-range", type=float, nargs=2, metavar=("START", "END"))
+    parser.add_argument("--all-keys", action="store_true", help="Switch on every key.")
+    parser.add_argument("--every-frame", action="store_true")
+    parser.add_argument("--step", type=float, default=1.0)
+    parser.add_argument("--reduce", action="store_true", help="Reduce baked keys.")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--timeout", type=float, help="Seconds allowed per scene.")
+    parser.add_argument("--output-dir", help="Save here instead of over the scenes.")
+    parser.add_argument("--mayapy", default="mayapy", help="mayapy executable.")
+    parser.add_argument(
+        "--worker-command",
+        help="Command to run instead of mayapy, given each job file path.",
+    )
+    parser.add_argument(
+        "--stand-in", action="store_true", help="Use workers that don't need Maya."
+    )
+    parser.add_argument("--report", help="Write the JSON report to this file.")
+    args = parser.parse_args(argv)
+
+    switches = []
+    if args.specs:
+        with open(args.specs, "r") as specs_file:
+            switches.extend(json.load(specs_file))
+    for spec in args.switch:
+        spec.update(
+            target=args.target,
+            frame_range=args.frame_range,
+            all_keys=args.all_keys,
+            every_frame=args.every_frame,
+            step=args.step,
+            reduce=args.reduce,
+        )
+        switches.append(spec)
+    if not switches:
+        parser.error("nothing to switch, use --switch or --specs")
+
+    if args.worker_command:
+        command = shlex.split(args.worker_command)
+    elif args.stand_in:
+        command = [sys.executable, os.path.abspath(__file__), "--stand-in-worker"]
+    else:
+        command = [args.mayapy, os.path.abspath(__file__), "--worker"]
+
+    if args.output_dir:
+        # Scenes sharing a file name would overwrite each other there
+        names = [os.path.normcase(os.path.basename(scene)) for scene in args.scenes]
+        clashes = sorted(set(name for name in names if names.count(name) > 1))
+        if clashes:
+            parser.error(
+                "scenes with the same file name can't share --output-dir: "
+                + ", ".join(clashes)
+            )
+        if not os.path.isdir(args.output_dir):
+            os.makedirs(args.output_dir)
+
+    job_dir = tempfile.mkdtemp(prefix="spaceswitch_batch_")
+    try:
+        jobs = build_jobs(args.scenes, switches, args.output_dir, job_dir)
+        start = time.time()
+        report = run_batch(jobs, command, args.workers, args.timeout, log=print)
+    finally:
+        shutil.rmtree(job_dir, ignore_errors=True)
+
+    print_report(report)
+    print("Batch took {:.1f}s with {} workers".format(time.time() - start, args.workers))
+    if args.report:
+        with open(args.report, "w") as report_file:
+            json.dump(report, report_file, indent=2)
+    return 1 if any(not entry["ok"] for entry in report) else 0
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3 and sys.argv[1] == "--worker":
+        worker(sys.argv[2])
+    elif len(sys.argv) == 3 and sys.argv[1] == "--stand-in-worker":
+        stand_in_worker(sys.argv[2])
+    else:
+        sys.exit(main())
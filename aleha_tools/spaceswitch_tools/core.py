@@ -0,0 +1,1183 @@
+"""
+SpaceSwitch engine, without any UI.
+
+Needs only Maya, so it can run in mayapy batch jobs:
+
+from aleha_tools.spaceswitch_tools import core
+report = core.switch("rig:hand_ctrl", "space", "world", all_keys=True)
+"""
+
+import maya.OpenMaya as om
+import maya.api.OpenMaya as om2, maya.api.OpenMayaAnim as oma2
+import maya.cmds as cmds
+import os, json, math, time
+
+from aleha_tools.spaceswitch_tools import api_undo
+
+try:
+    from aleha_tools.spaceswitch_tools import matrix_math, key_reduction
+except ImportError:
+    # NumPy is not available in every Maya install
+    matrix_math = key_reduction = None
+
+
+TRANSFORM_CHANNELS = (
+    "translateX",
+    "translateY",
+    "translateZ",
+    "rotateX",
+    "rotateY",
+    "rotateZ",
+    "scaleX",
+    "scaleY",
+    "scaleZ",
+)
+
+# Largest error allowed when reducing dense bakes, in internal units
+KEY_REDUCTION_TOLERANCE = {
+    "translate": 0.01,
+    "rotate": math.radians(0.05),
+    "scale": 0.001,
+}
+
+
+def get_plug(node, attr):
+    sel = om2.MSelectionList()
+    sel.add(node)
+    plug = om2.MFnDependencyNode(sel.getDependNode(0)).findPlug(attr, False)
+    if plug.isArray:
+        plug = plug.elementByLogicalIndex(0)
+    return plug
+
+
+def get_mobject(node):
+    sel = om2.MSelectionList()
+    sel.add(node)
+    return sel.getDependNode(0)
+
+
+def get_dag_path(node):
+    sel = om2.MSelectionList()
+    sel.add(node)
+    return sel.getDagPath(0)
+
+
+class TimeContext(object):
+    """
+    Evaluate plugs at frame without moving the current time. MDGContextGuard
+    only exists from Maya 2022, before that the context goes to every read.
+    """
+
+    has_guard = hasattr(om2, "MDGContextGuard")
+
+    def __init__(self, frame, unit):
+        self.context = om2.MDGContext(om2.MTime(frame, unit))
+        self.guard = None
+
+    def __enter__(self):
+        if self.has_guard:
+            self.guard = om2.MDGContextGuard(self.context)
+            self.guard.__enter__()
+        return self
+
+    def __exit__(self, *args):
+        if self.guard is not None:
+            self.guard.__exit__(*args)
+            self.guard = None
+        return False
+
+    def as_mobject(self, plug):
+        if self.has_guard:
+            return plug.asMObject()
+        return plug.asMObject(self.context)
+
+    def as_double(self, plug):
+        if self.has_guard:
+            return plug.asDouble()
+        return plug.asDouble(self.context)
+
+
+def sample_matrices(nodes, frames, attr="worldMatrix", progress=None):
+    """
+    Read a matrix attribute of every node at its own frames through a DG context,
+    without moving the current time. frames holds one frame list per node, and
+    all nodes share a single walk over the union of their frames.
+    progress.step() is called once per sampled frame.
+    Returns one list of flat 16 float matrices per node, in its frames order.
+    """
+    plugs = [get_plug(node, attr) for node in nodes]
+    wanted = {}
+    for i, node_frames in enumerate(frames):
+        for frame in node_frames:
+            wanted.setdefault(frame, []).append(i)
+
+    unit = om2.MTime.uiUnit()
+    samples = [{} for _ in plugs]
+    for frame in sorted(wanted):
+        with TimeContext(frame, unit) as context:
+            for i in wanted[frame]:
+                matrix = om2.MFnMatrixData(context.as_mobject(plugs[i])).matrix()
+                samples[i][frame] = list(matrix)
+        if progress:
+            progress.step()
+    return [
+        [samples[i][frame] for frame in node_frames]
+        for i, node_frames in enumerate(frames)
+    ]
+
+
+def sample_values(plugs, frames):
+    """Read numeric plugs, in internal units, at every frame through a DG context."""
+    unit = om2.MTime.uiUnit()
+    values = [[] for _ in plugs]
+    for frame in frames:
+        with TimeContext(frame, unit) as context:
+            for i, plug in enumerate(plugs):
+                values[i].append(context.as_double(plug))
+    return values
+
+
+# Wider enum value ranges are read with one listEnum query instead of a
+# fieldName call per value
+ENUM_SCAN_LIMIT = 256
+
+
+def read_enum_fields(node, attribute):
+    """(name, value) fields of an enum attribute MObject of node, in value order."""
+    attr_fn = om2.MFnEnumAttribute(attribute)
+    start, end = attr_fn.getMin(), attr_fn.getMax()
+    fields = []
+    if end - start < ENUM_SCAN_LIMIT:
+        for value in range(start, end + 1):
+            try:
+                fields.append((attr_fn.fieldName(value), value))
+            except:
+                # Enums with explicit values leave gaps
+                continue
+        return fields
+
+    # "a:b=100000:c", fields without a value follow the previous one
+    names = cmds.attributeQuery(attr_fn.name, node=node, listEnum=True) or [""]
+    value = 0
+    for field in names[0].split(":"):
+        name, _, explicit = field.partition("=")
+        if explicit:
+            value = int(explicit)
+        if name:
+            fields.append((name, value))
+        value += 1
+    return sorted(fields, key=lambda field: field[1])
+
+
+def query_enum_attributes(node, writable=True):
+    """
+    Read the switchable enum attributes of node in one pass over its attributes.
+    Returns (attributes, options): the keyable enums in attribute order, or
+    None when nothing on node is keyable, and the (name, value) fields of
+    each of them and of rotateOrder. With writable, enums that can't be keyed
+    right now (locked, connected) are left out.
+    """
+    node_fn = om2.MFnDependencyNode(get_mobject(node))
+    attributes, options = [], {}
+    animatable = False
+    for i in range(node_fn.attributeCount()):
+        attribute = node_fn.attribute(i)
+        attr_fn = om2.MFnAttribute(attribute)
+        if attr_fn.array:
+            continue
+        try:
+            plug = node_fn.findPlug(attribute, False)
+            keyable = plug.isKeyable and not (writable and plug.isLocked)
+        except:
+            continue
+        animatable = animatable or keyable
+        if not attribute.hasFn(om2.MFn.kEnumAttribute):
+            continue
+        if not (keyable or attr_fn.name == "rotateOrder"):
+            continue
+
+        fields = read_enum_fields(node, attribute)
+        if any(name.isalnum() for name, value in fields):
+            options[attr_fn.name] = fields
+            if keyable and (not writable or can_write_keys(plug)):
+                attributes.append(attr_fn.name)
+    if not animatable:
+        return None, options
+    return attributes, options
+
+
+class EnumCache(object):
+    """
+    Keyable enum attributes and their options per node, so selection
+    changes don't query every attribute again. Nodes without user defined
+    attributes share one entry per node type, the rest get one per UUID.
+    Entries are only dropped when an attribute is added to or removed from
+    their node, so they hold metadata only: locks and connections are
+    checked when the attributes are read, see get_enum_attributes.
+    """
+
+    def __init__(self):
+        self.entries = {}
+        self.keys = {}
+        self.callbacks = {}
+        self.changed = set()
+
+    def get(self, node):
+        obj = get_mobject(node)
+        node_fn = om2.MFnDependencyNode(obj)
+        uuid = node_fn.uuid().asString()
+
+        key = self.keys.get(uuid)
+        if key is None:
+            # Referenced controls come from the saved rig index when unchanged
+            entry = None
+            if uuid not in self.changed:
+                entry = rig_index.lookup(node)
+            if entry is not None:
+                key = uuid
+                self.entries[key] = entry
+            elif cmds.listAttr(node, userDefined=True):
+                key = uuid
+            else:
+                key = node_fn.typeName
+            self.keys[uuid] = key
+            self.watch(uuid, obj)
+
+        if key not in self.entries:
+            self.entries[key] = query_enum_attributes(node, writable=False)
+        return self.entries[key]
+
+    def watch(self, uuid, obj):
+        if uuid in self.callbacks:
+            return
+        self.callbacks[uuid] = om2.MNodeMessage.addAttributeAddedOrRemovedCallback(
+            obj, lambda *args: self.forget(uuid)
+        )
+
+    def forget(self, uuid):
+        # A node of a shared type is looked up again and gets its own entry
+        self.changed.add(uuid)
+        if self.keys.pop(uuid, None) == uuid:
+            self.entries.pop(uuid, None)
+
+    def clear(self):
+        if self.callbacks:
+            try:
+                om2.MMessage.removeCallbacks(list(self.callbacks.values()))
+            except:
+                pass
+        self.entries, self.keys, self.callbacks = {}, {}, {}
+        self.changed = set()
+
+
+def get_prefs_dir():
+    prefs_dir = os.path.join(
+        os.environ["MAYA_APP_DIR"], cmds.about(v=True), "prefs", "aleha_tools"
+    )
+    if not os.path.exists(prefs_dir):
+        os.makedirs(prefs_dir)
+    return prefs_dir
+
+
+class RigIndex(object):
+    """
+    Switchable enum attributes of every control of referenced rigs, saved to
+    disk per reference file path along with the file's modification time.
+    A rig is scanned the first time one of its controls is looked up; later
+    sessions and shots using the same file load it from disk. Controls are
+    stored without their namespace.
+
+    Only enum metadata is stored: whether an attribute can be keyed depends
+    on the shot (connections, locks), so that is checked on every lookup.
+    """
+
+    FILE_NAME = "spaceswitchRigs.json"
+    VERSION = 2
+
+    def __init__(self, path=None):
+        self.path = path
+        self.rigs = None
+        self.references = {}
+
+    def get_path(self):
+        if not self.path:
+            self.path = os.path.join(get_prefs_dir(), self.FILE_NAME)
+        return self.path
+
+    def load(self):
+        if self.rigs is None:
+            self.rigs = {}
+            try:
+                with open(self.get_path(), "r") as index_file:
+                    self.rigs = json.load(index_file)
+            except:
+                pass
+        return self.rigs
+
+    def save(self):
+        try:
+            with open(self.get_path(), "w") as index_file:
+                json.dump(self.rigs, index_file)
+        except:
+            # Read-only prefs, the index stays in memory
+            pass
+
+    @staticmethod
+    def split_namespace(node):
+        return node.split("|")[-1].rpartition(":")[::2]
+
+    def get_reference(self, node):
+        """(namespace, reference file) of a referenced node, or None."""
+        namespace = self.split_namespace(node)[0]
+        if not namespace:
+            return None
+        if namespace not in self.references:
+            reference = None
+            try:
+                if cmds.referenceQuery(node, isNodeReferenced=True):
+                    reference = cmds.referenceQuery(
+                        node, filename=True, withoutCopyNumber=True
+                    )
+            except:
+                pass
+            self.references[namespace] = reference
+        if self.references[namespace]:
+            return namespace, self.references[namespace]
+
+    def get_rig(self, node, rescan=False):
+        """
+        Namespace and {control: [attributes, options]} of the rig node belongs
+        to, scanning it if the reference file changed since it was indexed.
+        Returns (None, None) for nodes that are not referenced.
+        """
+        reference = self.get_reference(node)
+        if not reference:
+            return None, None
+        namespace, path = reference
+        try:
+            mtime = os.path.getmtime(path)
+        except:
+            return None, None
+
+        rigs = self.load()
+        rig = rigs.get(path)
+        if (
+            rescan
+            or not rig
+            or rig["mtime"] != mtime
+            or rig.get("version") != self.VERSION
+        ):
+            rig = rigs[path] = {
+                "mtime": mtime,
+                "version": self.VERSION,
+                "controls": self.scan(node),
+            }
+            self.save()
+        return namespace, rig["controls"]
+
+    def scan(self, node):
+        controls = {}
+        reference_node = cmds.referenceQuery(node, referenceNode=True)
+        nodes = cmds.referenceQuery(reference_node, nodes=True) or []
+        for control in cmds.ls(nodes, type="transform") or []:
+            attributes, options = query_enum_attributes(control, writable=False)
+            if attributes is not None:
+                controls[self.split_namespace(control)[1]] = [attributes, options]
+        return controls
+
+    def lookup(self, node):
+        """
+        The (attributes, options) enum entry of a referenced node, or None
+        when it is not referenced or not in its rig's index.
+        """
+        namespace, controls = self.get_rig(node)
+        if not controls:
+            return None
+        entry = controls.get(self.split_namespace(node)[1])
+        if entry is None:
+            return None
+        attributes, options = entry
+        return attributes, options
+
+    def switchable_controls(self, node):
+        """(control, attributes) of every switchable control in node's rig."""
+        namespace, controls = self.get_rig(node)
+        if not controls:
+            return []
+        switchable = []
+        for control, (attributes, options) in sorted(controls.items()):
+            control = "{}:{}".format(namespace, control)
+            attributes = get_writable_attributes(control, attributes)
+            if attributes:
+                switchable.append((control, attributes))
+        return switchable
+
+    def clear(self):
+        # Namespaces can point to other files in the next scene
+        self.references = {}
+
+
+enum_cache = EnumCache()
+rig_index = RigIndex()
+
+
+def get_writable_attributes(node, attributes):
+    """The attributes of node that can be keyed right now."""
+    names = []
+    for attr in attributes:
+        try:
+            if can_write_keys(get_plug(node, attr)):
+                names.append(attr)
+        except:
+            continue
+    return names
+
+
+def get_enum_attributes(node, rotate_order=False):
+    """
+    Switchable enum attributes of node, the cached ones that can be keyed
+    right now. With rotate_order, rotateOrder is added unless nothing on
+    node can be keyed.
+    """
+    attributes, options = enum_cache.get(node)
+    attributes = get_writable_attributes(node, attributes or [])
+    if (
+        rotate_order
+        and "rotateOrder" in options
+        and "rotateOrder" not in attributes
+        and (attributes or cmds.listAttr(node, keyable=True, unlocked=True))
+    ):
+        attributes.append("rotateOrder")
+    return attributes
+
+
+def get_enum_options(node, attr):
+    """(name, value) fields of an enum attribute on node."""
+    options = enum_cache.get(node)[1].get(attr)
+    if options is None:
+        options = read_enum_fields(node, get_plug(node, attr).attribute())
+    return options
+
+
+def orthonormalize_rows(rows):
+    """
+    (rotation rows, scale) of a 3x3 matrix given as rows, solving shear along
+    with scale. Same as matrix_math.orthonormalize, for Maya without NumPy.
+    """
+    det = (
+        rows[0][0] * (rows[1][1] * rows[2][2] - rows[1][2] * rows[2][1])
+        - rows[0][1] * (rows[1][0] * rows[2][2] - rows[1][2] * rows[2][0])
+        + rows[0][2] * (rows[1][0] * rows[2][1] - rows[1][1] * rows[2][0])
+    )
+    flip = -1.0 if det < 0 else 1.0
+    rotation, scale = [], []
+    for row in rows:
+        row = list(row)
+        for axis in rotation:
+            projection = sum(a * b for a, b in zip(row, axis))
+            row = [a - projection * b for a, b in zip(row, axis)]
+        length = math.sqrt(sum(a * a for a in row))
+        rotation.append([a / (length or 1.0) for a in row])
+        scale.append(length)
+    return [[a * flip for a in row] for row in rotation], [a * flip for a in scale]
+
+
+def decompose_local_matrices(
+    node, world_matrices, parent_inverse_matrices, frames=None
+):
+    """
+    Solve the translate/rotate/scale values that put node on each world matrix,
+    given the parent inverse matrix sampled at the same frame.
+    Respects rotateOrder, pivots and their translations, rotateAxis, shear,
+    jointOrient and segmentScaleCompensate, whose inverseScale is sampled on
+    frames. Rotations are in radians.
+    """
+    transform_fn = om2.MFnTransform(get_dag_path(node))
+    rotate_order = get_plug(node, "rotateOrder").asInt()
+    rotate_pivot = list(transform_fn.rotatePivot(om2.MSpace.kTransform))[:3]
+    scale_pivot = list(transform_fn.scalePivot(om2.MSpace.kTransform))[:3]
+    rotate_pivot_translate = list(
+        transform_fn.rotatePivotTranslation(om2.MSpace.kTransform)
+    )[:3]
+    scale_pivot_translate = list(
+        transform_fn.scalePivotTranslation(om2.MSpace.kTransform)
+    )[:3]
+    rotate_axis = [get_plug(node, "rotateAxis" + axis).asDouble() for axis in "XYZ"]
+    joint_orient = inverse_scale = None
+    if transform_fn.object().hasFn(om2.MFn.kJoint):
+        joint_orient = [
+            get_plug(node, "jointOrient" + axis).asDouble() for axis in "XYZ"
+        ]
+        if get_plug(node, "segmentScaleCompensate").asBool():
+            plugs = [get_plug(node, "inverseScale" + axis) for axis in "XYZ"]
+            if frames is None:
+                inverse_scale = [[plug.asDouble() for plug in plugs]]
+            else:
+                inverse_scale = list(zip(*sample_values(plugs, frames)))
+
+    if matrix_math:
+        translate, rotate, scale = matrix_math.decompose(
+            world_matrices,
+            parent_inverse_matrices,
+            rotate_order=rotate_order,
+            rotate_pivot=rotate_pivot,
+            scale_pivot=scale_pivot,
+            joint_orient=joint_orient,
+            rotate_axis=rotate_axis,
+            rotate_pivot_translate=rotate_pivot_translate,
+            scale_pivot_translate=scale_pivot_translate,
+            inverse_scale=inverse_scale,
+        )
+        channels = {}
+        for i, axis in enumerate("XYZ"):
+            channels["translate" + axis] = translate[:, i].tolist()
+            channels["rotate" + axis] = rotate[:, i].tolist()
+            channels["scale" + axis] = scale[:, i].tolist()
+        return channels
+
+    # Same solve as matrix_math.decompose, one frame at a time:
+    # Sp^-1 * S * Sh * Sp * Spt * Rp^-1 * Ra * R * Jo * Rp * Rpt * Is * T
+    axis_inverse = om2.MEulerRotation(*rotate_axis).asMatrix().transpose()
+    orient_inverse = om2.MMatrix()
+    if joint_orient:
+        orient_inverse = om2.MEulerRotation(*joint_orient).asMatrix().transpose()
+    offset = [
+        s + st - r for s, st, r in zip(scale_pivot, scale_pivot_translate, rotate_pivot)
+    ]
+    rotate_offset = [r + rt for r, rt in zip(rotate_pivot, rotate_pivot_translate)]
+
+    channels = dict((attr, []) for attr in TRANSFORM_CHANNELS)
+    previous = None
+    for i, (world, parent_inverse) in enumerate(
+        zip(world_matrices, parent_inverse_matrices)
+    ):
+        local = list(om2.MMatrix(world) * om2.MMatrix(parent_inverse))
+        upper = [local[0:3], local[4:7], local[8:11]]
+        parent_scale = [1.0, 1.0, 1.0]
+        if inverse_scale:
+            parent_scale = inverse_scale[min(i, len(inverse_scale) - 1)]
+
+        # Is is the inverse of the parent scale, taken off the columns
+        rotation, scale = orthonormalize_rows(
+            [[a * b for a, b in zip(row, parent_scale)] for row in upper]
+        )
+        translate = []
+        for axis in range(3):
+            pivot = sum(scale_pivot[k] * upper[k][axis] for k in range(3))
+            rotated = sum(offset[k] * rotation[k][axis] for k in range(3))
+            translate.append(
+                local[12 + axis]
+                + pivot
+                - (rotated + rotate_offset[axis]) / parent_scale[axis]
+            )
+
+        rotation_matrix = om2.MMatrix(
+            [row + [0.0] for row in rotation] + [[0.0, 0.0, 0.0, 1.0]]
+        )
+        rotation_matrix = axis_inverse * rotation_matrix * orient_inverse
+        rotate = om2.MTransformationMatrix(rotation_matrix).rotation()
+        rotate = rotate.reorder(rotate_order)
+        if previous is not None:
+            rotate = rotate.closestSolution(previous)
+        previous = rotate
+
+        for k, axis in enumerate("XYZ"):
+            channels["translate" + axis].append(translate[k])
+            channels["rotate" + axis].append(rotate[k])
+            channels["scale" + axis].append(scale[k])
+    return channels
+
+
+def get_anim_curve(plug):
+    sources = plug.connectedTo(True, False)
+    if sources and sources[0].node().hasFn(om2.MFn.kAnimCurve):
+        return sources[0].node()
+
+
+def can_write_keys(plug):
+    if plug.isLocked:
+        return False
+    if get_anim_curve(plug):
+        return True
+    return plug.isKeyable and not plug.isDestination
+
+
+class CurveEdit(object):
+    """
+    Collects every anim curve and plug edit of a bake in one MDGModifier and
+    one MAnimCurveChange, so the whole bake is a single undo step.
+    """
+
+    def __init__(self):
+        self.modifier = om2.MDGModifier()
+        self.change = oma2.MAnimCurveChange()
+
+    def flush(self):
+        # Apply pending plug values and curve connections so they can be sampled
+        self.modifier.doIt()
+
+    def undoIt(self):
+        self.change.undoIt()
+        self.modifier.undoIt()
+
+    def redoIt(self):
+        self.modifier.doIt()
+        self.change.redoIt()
+
+    def commit(self):
+        self.flush()
+        api_undo.register(self)
+
+
+def write_keys(plug, frames, values, edit, tangent=None):
+    """
+    Key every (frame, value) pair on the plug's anim curve in one addKeys call,
+    creating the curve if needed. Existing keys at other times are kept.
+    Values are in internal units (centimeters, radians).
+    """
+    curve_fn = oma2.MFnAnimCurve()
+    curve = get_anim_curve(plug)
+    if curve:
+        curve_fn.setObject(curve)
+    else:
+        curve_fn.create(
+            plug, curve_fn.timedAnimCurveTypeForPlug(plug), edit.modifier
+        )
+
+    if tangent is None:
+        tangent = oma2.MFnAnimCurve.kTangentGlobal
+    unit = om2.MTime.uiUnit()
+    times = om2.MTimeArray([om2.MTime(frame, unit) for frame in frames])
+    curve_fn.addKeys(
+        times, om2.MDoubleArray(values), tangent, tangent, True, edit.change
+    )
+
+
+def clear_keys(plug, start, end, edit):
+    curve = get_anim_curve(plug)
+    if not curve:
+        return
+    curve_fn = oma2.MFnAnimCurve(curve)
+    unit = om2.MTime.uiUnit()
+    for index in reversed(range(curve_fn.numKeys)):
+        if start <= curve_fn.input(index).asUnits(unit) <= end:
+            curve_fn.remove(index, edit.change)
+
+
+def write_local_keys(node, frames, channels, edit, tolerance=1e-6, reduce=False):
+    """
+    Key the solved channels of node on frames. With reduce, the baked range
+    is cleared and only the keys needed to stay within
+    KEY_REDUCTION_TOLERANCE are written.
+    """
+    # Unanimated channels stay static unless the switch moves them over time
+    written = []
+    for attr in TRANSFORM_CHANNELS:
+        plug = get_plug(node, attr)
+        if not can_write_keys(plug):
+            continue
+        values = channels[attr]
+        if not get_anim_curve(plug):
+            if all(abs(v - values[0]) < tolerance for v in values):
+                if abs(values[0] - plug.asDouble()) >= tolerance:
+                    edit.modifier.newPlugValueDouble(plug, values[0])
+                continue
+
+        attr_frames, tangent = frames, None
+        if reduce and key_reduction:
+            kept = key_reduction.reduce_keys(
+                frames, values, KEY_REDUCTION_TOLERANCE[attr[:-1]]
+            )
+            attr_frames = [frames[i] for i in kept]
+            values = [values[i] for i in kept]
+            clear_keys(plug, frames[0], frames[-1], edit)
+            # The reduction error is measured against linear interpolation
+            tangent = oma2.MFnAnimCurve.kTangentLinear
+        write_keys(plug, attr_frames, values, edit, tangent=tangent)
+        written.append(attr)
+    return written
+
+
+def key_enum(control, attr, value, frames, edit):
+    plug = get_plug(control, attr)
+    if get_anim_curve(plug):
+        write_keys(
+            plug,
+            frames,
+            [value] * len(frames),
+            edit,
+            tangent=oma2.MFnAnimCurve.kTangentStep,
+        )
+    else:
+        edit.modifier.newPlugValueInt(plug, value)
+
+
+def get_rotation_key_times(node):
+    keyframes = cmds.keyframe(
+        node, attribute=["rotateX", "rotateY", "rotateZ"], query=True, timeChange=True
+    )
+    return sorted(set(keyframes or []))
+
+
+def convert_rotate_order(node, rotate_order, frames=None):
+    """
+    Re-express the rotation keys of node in a new rotate order, keeping its
+    orientation on every key. The rotations are Euler filtered as a whole and
+    each rotate curve is written back once. Without frames every rotation key
+    is converted. Returns the converted frames.
+    """
+    if frames is None:
+        frames = get_rotation_key_times(node)
+    if not frames:
+        return []
+
+    rotate_plugs = [get_plug(node, "rotate" + axis) for axis in "XYZ"]
+    values = sample_values(rotate_plugs + [get_plug(node, "rotateOrder")], frames)
+    from_orders = [int(order) for order in values[3]]
+
+    if matrix_math:
+        rotations = matrix_math.convert_rotate_order(
+            list(zip(*values[:3])), from_orders, rotate_order
+        )
+        rotations = rotations.T.tolist()
+    else:
+        rotations = [[], [], []]
+        previous = None
+        for x, y, z, order in zip(values[0], values[1], values[2], from_orders):
+            rotate = om2.MEulerRotation(x, y, z, order).reorder(rotate_order)
+            if previous is not None:
+                rotate = rotate.closestSolution(previous)
+            previous = rotate
+            for i in range(3):
+                rotations[i].append(rotate[i])
+
+    edit = CurveEdit()
+    for plug, channel in zip(rotate_plugs, rotations):
+        if can_write_keys(plug):
+            write_keys(plug, frames, channel, edit)
+    key_enum(node, "rotateOrder", rotate_order, frames, edit)
+    edit.commit()
+    return frames
+
+
+def split_dag_levels(nodes):
+    """
+    Group node indices so that no node shares a group with one of its DAG
+    ancestors, parents first.
+    """
+    paths = [get_dag_path(node).fullPathName() for node in nodes]
+    pending = list(range(len(nodes)))
+    levels = []
+    while pending:
+        level = [
+            i
+            for i in pending
+            if not any(paths[i].startswith(paths[j] + "|") for j in pending)
+        ]
+        levels.append(level)
+        pending = [i for i in pending if i not in level]
+    return levels
+
+
+def switch_current_frame(switches):
+    """
+    Switch (control, enum_attr, value, target) tuples on the current frame,
+    keeping every target on its world pose.
+    """
+    targets = [switch[3] for switch in switches]
+    matrices = [cmds.xform(target, q=True, ws=True, matrix=True) for target in targets]
+    for control, attr, value, target in switches:
+        cmds.setAttr("{}.{}".format(control, attr), value)
+    for level in split_dag_levels(targets):
+        for i in level:
+            cmds.xform(targets[i], ws=True, matrix=matrices[i])
+
+
+def get_enum_key_frames(control, attr, frames):
+    # A stepped enum only needs its range ends and the keys it already has
+    keyframes = cmds.keyframe(control, attribute=attr, query=True, timeChange=True)
+    existing = [frame for frame in keyframes or [] if frames[0] <= frame <= frames[-1]]
+    return sorted(set([frames[0], frames[-1]] + existing))
+
+
+class BakeCancelled(Exception):
+    """Raised when a bake is cancelled. partial is set once keys were changed."""
+
+    partial = False
+
+
+class BakeProgress(object):
+    """
+    How far a bake has got over its frames, shared by whatever shows it.
+    Frames are captured and then applied in order, so captured and applied
+    are just counts into the sorted frames, kept by plain arithmetic.
+    Every call is passed on to listener (e.g. a progress bar), which may
+    raise BakeCancelled.
+    """
+
+    CAPTURE = "Saving Positions"
+    SWITCH = "Switching Space"
+    APPLY = "Applying Positions"
+
+    def __init__(self, frames, listener=None):
+        self.frames = sorted(set(frames))
+        self.listener = listener
+        self.phase = None
+        self.total = 1
+        self.count = 0
+        self.captured = 0
+        self.applied = 0
+
+    def set_status(self, status, total):
+        if self.phase == self.CAPTURE:
+            self.captured = len(self.frames)
+        self.phase = status
+        self.total = max(total, 1)
+        self.count = 0
+        if self.listener:
+            self.listener.set_status(status, total)
+
+    def step(self, count=1):
+        self.count += count
+        done = min(len(self.frames) * self.count // self.total, len(self.frames))
+        if self.phase == self.CAPTURE:
+            self.captured = done
+        elif self.phase == self.APPLY:
+            self.applied = done
+        if self.listener:
+            self.listener.step(count)
+
+
+def switch_spaces(switches, progress=None, reduce=False):
+    """
+    Switch the space of many controls over their frames in one shared pass.
+    switches is a list of (control, enum_attr, value, target, frames) tuples:
+    the enum on control is keyed to value and target keeps its world pose on
+    every frame. progress gets set_status(status, total) for every phase and
+    step() for every unit of work; it may raise BakeCancelled.
+    reduce simplifies dense bakes down to the keys they need.
+    """
+    targets = [switch[3] for switch in switches]
+    frames = [switch[4] for switch in switches]
+
+    def set_status(status, total):
+        if progress:
+            progress.set_status(status, total)
+
+    # Capture every target before any space changes
+    set_status(BakeProgress.CAPTURE, len(set(f for fs in frames for f in fs)))
+    worlds = sample_matrices(targets, frames, progress=progress)
+
+    # Every edit below is undone as one step, even when the bake stops halfway
+    edit = CurveEdit()
+    try:
+        set_status(BakeProgress.SWITCH, len(switches))
+        for control, attr, value, target, node_frames in switches:
+            if reduce:
+                node_frames = get_enum_key_frames(control, attr, node_frames)
+            key_enum(control, attr, value, node_frames, edit)
+            if progress:
+                progress.step()
+        edit.flush()
+
+        # Parents are keyed before their children sample their parent inverse
+        levels = split_dag_levels(targets)
+        set_status(
+            BakeProgress.APPLY,
+            sum(len(set(f for i in level for f in frames[i])) for level in levels),
+        )
+        for level in levels:
+            parent_inverses = sample_matrices(
+                [targets[i] for i in level],
+                [frames[i] for i in level],
+                attr="parentInverseMatrix",
+                progress=progress,
+            )
+            for i, parent_inverse in zip(level, parent_inverses):
+                channels = decompose_local_matrices(
+                    targets[i], worlds[i], parent_inverse, frames[i]
+                )
+                write_local_keys(
+                    targets[i], frames[i], channels, edit, reduce=reduce
+                )
+            edit.flush()
+    except BakeCancelled as cancel:
+        cancel.partial = True
+        raise
+    finally:
+        edit.commit()
+
+
+class BakeContext(object):
+    """
+    Puts Maya in the fastest state for a bake and restores it afterwards,
+    even when the bake fails: viewport refresh, auto key, cycle checking and
+    cached playback are turned off.
+
+    The evaluation manager keeps the user's mode, unless another mode was
+    already measured faster on this rig. Bake times per frame are saved per
+    rig and mode to the prefs folder, keeping the last few runs of each.
+    """
+
+    MODES = ("off", "serial", "parallel")
+    FILE_NAME = "spaceswitchBakeTimings.json"
+    RUNS = 10
+    timings = None
+
+    def __init__(self, rig="", frames=0, mode=None):
+        self.rig = rig
+        self.frames = frames
+        self.mode = mode
+
+    @classmethod
+    def load_timings(cls):
+        if cls.timings is None:
+            cls.timings = {}
+            try:
+                with open(os.path.join(get_prefs_dir(), cls.FILE_NAME), "r") as f:
+                    cls.timings = json.load(f)
+            except:
+                pass
+        return cls.timings
+
+    @classmethod
+    def save_timings(cls):
+        try:
+            with open(os.path.join(get_prefs_dir(), cls.FILE_NAME), "w") as f:
+                json.dump(cls.timings, f)
+        except:
+            # Read-only prefs, timings stay in memory
+            pass
+
+    @classmethod
+    def averages(cls, rig):
+        runs = cls.load_timings().get(rig, {})
+        return dict(
+            (mode, sum(runs[mode]) / len(runs[mode]))
+            for mode in cls.MODES
+            if runs.get(mode)
+        )
+
+    @classmethod
+    def pick_mode(cls, rig, current="parallel"):
+        """current, or a mode measured faster than it on rig."""
+        averages = cls.averages(rig)
+        if current not in averages:
+            return current
+        return min(averages, key=averages.get)
+
+    @classmethod
+    def add_timing(cls, rig, mode, seconds_per_frame):
+        runs = cls.load_timings().setdefault(rig, {}).setdefault(mode, [])
+        runs.append(seconds_per_frame)
+        del runs[: -cls.RUNS]
+        cls.save_timings()
+
+    @classmethod
+    def report(cls, rig):
+        averages = cls.averages(rig)
+        return ", ".join(
+            "{}: {:.2f} ms/frame".format(mode, 1000 * averages[mode])
+            if mode in averages
+            else "{}: -".format(mode)
+            for mode in cls.MODES
+        )
+
+    def __enter__(self):
+        self.start = time.time()
+        self.restore = []
+
+        mode = cmds.evaluationManager(q=True, mode=True)[0]
+        self.restore.append(lambda: cmds.evaluationManager(mode=mode))
+        autokey = cmds.autoKeyframe(q=True, state=True)
+        self.restore.append(lambda: cmds.autoKeyframe(state=autokey))
+        cycle_check = cmds.cycleCheck(q=True, evaluation=True)
+        self.restore.append(lambda: cmds.cycleCheck(evaluation=cycle_check))
+        try:
+            cache = cmds.evaluator(name="cache", q=True, enable=True)
+        except:
+            # No cached playback before Maya 2019
+            cache = False
+        if cache:
+            self.restore.append(lambda: cmds.evaluator(name="cache", enable=True))
+        self.restore.append(lambda: cmds.refresh(suspend=False))
+
+        cmds.refresh(suspend=True)
+        cmds.autoKeyframe(state=False)
+        cmds.cycleCheck(evaluation=False)
+        if cache:
+            cmds.evaluator(name="cache", enable=False)
+        if self.mode is None:
+            self.mode = self.pick_mode(self.rig, mode)
+        if mode != self.mode:
+            cmds.evaluationManager(mode=self.mode)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        for restore in reversed(self.restore):
+            try:
+                restore()
+            except:
+                pass
+
+        self.elapsed = time.time() - self.start
+        if exc_type is None and self.frames:
+            BakeContext.add_timing(self.rig, self.mode, self.elapsed / self.frames)
+            om.MGlobal.displayInfo(
+                "SpaceSwitch: baked {} frames in {:.2f}s with {} evaluation ({}).".format(
+                    self.frames, self.elapsed, self.mode, BakeContext.report(self.rig)
+                )
+            )
+        return False
+
+
+def get_switch_frames(
+    target, frame_range=None, all_keys=False, every_frame=False, step=1.0
+):
+    """
+    Frames a switch on target is baked on: its keys inside frame_range, or
+    all of them with all_keys. With every_frame, every step between the first
+    and last of those keys. Returns None when only the current frame should
+    change, and an empty list when frame_range holds no keys of target.
+    """
+    try:
+        keyframes = sorted(set(cmds.keyframe(target, query=True) or []))
+    except:
+        keyframes = []
+
+    if frame_range:
+        keyframes = [
+            frame for frame in keyframes if frame_range[0] <= frame <= frame_range[1]
+        ]
+        if not keyframes:
+            return []
+    elif not (all_keys and len(keyframes) > 1):
+        return None
+
+    if every_frame:
+        start, end = keyframes[0], keyframes[-1]
+        steps = int(round((end - start) / step))
+        keyframes = [start + i * step for i in range(steps + 1)]
+    return keyframes
+
+
+def get_batch_switches(nodes, option, enum_attr=None, rotate_order=False):
+    """
+    Switch every node to the enum field named option, each keeping itself in
+    place. enum_attr is used on nodes that have it, otherwise a node's only
+    switchable enum. Returns ((node, attr, value, node) switches, skipped nodes).
+    """
+    switches, skipped = [], []
+    for node in nodes:
+        attrs = get_enum_attributes(node, rotate_order)
+        if enum_attr in attrs:
+            attr = enum_attr
+        elif len(attrs) == 1:
+            attr = attrs[0]
+        else:
+            skipped.append(node)
+            continue
+        values = dict(get_enum_options(node, attr))
+        if option not in values:
+            skipped.append(node)
+            continue
+        switches.append((node, attr, values[option], node))
+    return switches, skipped
+
+
+def apply_switches(switches, progress=None, reduce=False):
+    """
+    Apply (control, enum_attr, value, target, frames) switches as one undo
+    chunk. frames None only switches the current frame, an empty list skips
+    the switch. A rotateOrder switch of a control on itself converts its
+    rotation keys instead. A cancelled bake is undone as a whole.
+
+    Returns a report: {"switches": [{"control", "attribute", "value",
+    "target", "mode", "frames"}], "cancelled", "seconds"}, where mode is
+    "current", "baked", "rotateOrder" or "skipped".
+    """
+    start = time.time()
+    report = {"switches": [], "cancelled": False, "seconds": 0.0}
+
+    current_frame, baked, rotate_orders = [], [], []
+    for control, attr, value, target, frames in switches:
+        mode = "baked"
+        if attr == "rotateOrder" and control == target:
+            # A static rotate order change affects every rotation key
+            if not get_anim_curve(get_plug(control, "rotateOrder")):
+                frames = get_rotation_key_times(control) or None
+            if frames:
+                rotate_orders.append((control, value, frames))
+                mode = "rotateOrder"
+        if mode == "baked":
+            if frames:
+                baked.append((control, attr, value, target, frames))
+            elif frames is None:
+                current_frame.append((control, attr, value, target))
+                mode = "current"
+            else:
+                # A frame range was asked for, but there is nothing to bake
+                mode = "skipped"
+        report["switches"].append(
+            {
+                "control": control,
+                "attribute": attr,
+                "value": value,
+                "target": target,
+                "mode": mode,
+                "frames": 1 if frames is None else len(frames),
+            }
+        )
+
+    rollback = False
+    cmds.undoInfo(openChunk=True)
+    try:
+        for node, rotate_order, frames in rotate_orders:
+            convert_rotate_order(node, rotate_order, frames)
+        if current_frame:
+            switch_current_frame(current_frame)
+        if baked:
+            # Evaluation timings are kept per rig namespace
+            rig = baked[0][0].rpartition(":")[0] or baked[0][0]
+            frame_count = sum(len(switch[4]) for switch in baked)
+            with BakeContext(rig=rig, frames=frame_count):
+                switch_spaces(baked, progress=progress, reduce=reduce)
+    except BakeCancelled as cancel:
+        rollback = cancel.partial or bool(rotate_orders or current_frame)
+        report["cancelled"] = True
+    finally:
+        cmds.undoInfo(closeChunk=True)
+
+    # Everything applied before the cancel is in the chunk just closed
+    if rollback:
+        cmds.undo()
+    report["seconds"] = time.time() - start
+    return report
+
+
+def switch(
+    control,
+    attr,
+    value,
+    target=None,
+    frame_range=None,
+    all_keys=False,
+    every_frame=False,
+    step=1.0,
+    reduce=False,
+    progress=None,
+):
+    """
+    Switch the enum attr of control to value, an enum value or field name,
+    keeping target (control by default) on its world pose. Frames are chosen
+    like get_switch_frames; without frame_range or all_keys only the current
+    frame changes, and a frame_range without keys skips the switch. Returns
+    the apply_switches report.
+    """
+    target = target or control
+    if not isinstance(value, int):
+        value = dict(get_enum_options(control, attr))[value]
+    frames = get_switch_frames(target, frame_range, all_keys, every_frame, step)
+    return apply_switches(
+        [(control, attr, value, target, frames)], progress=progress, reduce=reduce
+    )
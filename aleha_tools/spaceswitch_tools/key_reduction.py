@@ -0,0 +1,50 @@
+"""
+Vectorized key reduction for dense SpaceSwitch bakes.
+
+Needs only NumPy, so it can be used and tested outside of Maya.
+"""
+
+import numpy as np
+
+
+def reduce_keys(times, values, tolerance):
+    """
+    Indices of the keys to keep so that a linear interpolation between them
+    stays within tolerance of every baked value (Ramer-Douglas-Peucker on the
+    value error). values is (N,) or (N,C) with one tolerance per column.
+
+    Every iteration splits all the segments that are still over tolerance at
+    once, at their worst key.
+    """
+    times = np.asarray(times, dtype=float)
+    count = len(times)
+    values = np.asarray(values, dtype=float).reshape(count, -1)
+    tolerance = np.maximum(
+        np.broadcast_to(np.asarray(tolerance, dtype=float), (values.shape[1],)), 1e-12
+    )
+
+    indices = np.arange(count)
+    if count < 3:
+        return indices
+
+    keep = np.zeros(count, dtype=bool)
+    keep[[0, -1]] = True
+    while True:
+        kept = np.flatnonzero(keep)
+        # Segment of every key, named by the kept key on its left
+        segment = np.minimum(
+            np.searchsorted(kept, indices, side="right") - 1, len(kept) - 2
+        )
+        left, right = kept[segment], kept[segment + 1]
+        weight = (times - times[left]) / (times[right] - times[left])
+        expected = values[left] + (values[right] - values[left]) * weight[:, None]
+        error = (np.abs(values - expected) / tolerance).max(axis=1)
+        error[keep] = 0.0
+        if error.max() <= 1.0:
+            break
+
+        # Worst key of every segment, keeping only those over tolerance
+        order = np.lexsort((-error, segment))
+        worst = order[np.r_[True, segment[order][1:] != segment[order][:-1]]]
+        keep[worst[error[worst] > 1.0]] = True
+    return np.flatnonzero(keep)
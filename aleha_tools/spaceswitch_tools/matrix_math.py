@@ -0,0 +1,201 @@
+"""
+Vectorized matrix math for SpaceSwitch bakes.
+
+Works on stacks of Maya matrices (row vectors, translation in the last row)
+and needs only NumPy, so it can be used and tested outside of Maya.
+"""
+
+import numpy as np
+
+
+# Maya rotateOrder enum: xyz, yzx, zxy, xzy, yxz, zyx
+ROTATE_ORDERS = ((0, 1, 2), (1, 2, 0), (2, 0, 1), (0, 2, 1), (1, 0, 2), (2, 1, 0))
+
+
+def as_matrices(matrices):
+    """Return an (N,4,4) float array from (N,4,4), (N,16) or flat 16 float lists."""
+    return np.asarray(matrices, dtype=float).reshape(-1, 4, 4)
+
+
+def axis_rotation(axis, angles):
+    """(N,3,3) row vector rotation matrices around a single axis."""
+    angles = np.asarray(angles, dtype=float)
+    cos, sin = np.cos(angles), np.sin(angles)
+    i, j = [a for a in range(3) if a != axis]
+    sign = 1.0 if axis != 1 else -1.0
+    matrices = np.zeros(angles.shape + (3, 3))
+    matrices[..., axis, axis] = 1.0
+    matrices[..., i, i] = cos
+    matrices[..., j, j] = cos
+    matrices[..., i, j] = sign * sin
+    matrices[..., j, i] = -sign * sin
+    return matrices
+
+
+def euler_to_matrix(rotations, rotate_order=0):
+    """
+    (N,3,3) rotation matrices from (N,3) radians. rotate_order is a Maya
+    rotateOrder, either one for every rotation or an (N,) array.
+    """
+    rotations = np.asarray(rotations, dtype=float).reshape(-1, 3)
+    orders = np.broadcast_to(np.asarray(rotate_order, dtype=int), (len(rotations),))
+    matrices = np.empty((len(rotations), 3, 3))
+    for order in np.unique(orders):
+        mask = orders == order
+        first, second, third = ROTATE_ORDERS[int(order)]
+        rotation = rotations[mask]
+        matrices[mask] = np.matmul(
+            np.matmul(
+                axis_rotation(first, rotation[:, first]),
+                axis_rotation(second, rotation[:, second]),
+            ),
+            axis_rotation(third, rotation[:, third]),
+        )
+    return matrices
+
+
+def matrix_to_euler(matrices, rotate_order=0):
+    """(N,3) radians in the given Maya rotateOrder from (N,3,3) rotation matrices."""
+    matrices = np.asarray(matrices, dtype=float).reshape(-1, 3, 3)
+    i, j, k = ROTATE_ORDERS[rotate_order]
+    # Row vector matrices are the transpose of the column vector ones
+    m = np.swapaxes(matrices, -1, -2)
+    parity = 1.0 if (j - i) % 3 == 1 else -1.0
+
+    cy = np.hypot(m[:, i, i], m[:, j, i])
+    gimbal = cy < 1e-9
+
+    rotations = np.empty((len(m), 3))
+    rotations[:, j] = np.arctan2(-parity * m[:, k, i], cy)
+    rotations[:, i] = np.where(
+        gimbal,
+        np.arctan2(-parity * m[:, j, k], m[:, j, j]),
+        np.arctan2(parity * m[:, k, j], m[:, k, k]),
+    )
+    rotations[:, k] = np.where(
+        gimbal, 0.0, np.arctan2(parity * m[:, j, i], m[:, i, i])
+    )
+    return rotations
+
+
+def wrap_angles(angles):
+    """Wrap radians to [-pi, pi)."""
+    return (np.asarray(angles, dtype=float) + np.pi) % (2 * np.pi) - np.pi
+
+
+def alternate_euler(rotations, rotate_order=0):
+    """The other Euler solution for the same (N,3) radian rotations."""
+    i, j, k = ROTATE_ORDERS[rotate_order]
+    alternate = np.array(rotations, dtype=float).reshape(-1, 3)
+    alternate[:, i] += np.pi
+    alternate[:, j] = np.pi - alternate[:, j]
+    alternate[:, k] += np.pi
+    return alternate
+
+
+def euler_filter(rotations, rotate_order=0, reference=None):
+    """
+    Make a sequence of (N,3) radian rotations continuous.
+
+    Every frame keeps the Euler solution closest to the previous one and
+    360 degree jumps are removed, without looping over frames. The result is
+    shifted by whole turns to start as close as possible to reference.
+    """
+    rotations = np.asarray(rotations, dtype=float).reshape(-1, 3)
+    filtered = rotations.copy()
+    if len(rotations) > 1:
+        alternate = alternate_euler(rotations, rotate_order)
+        previous = rotations[:-1]
+        stay = np.abs(wrap_angles(rotations[1:] - previous)).sum(axis=1)
+        jump = np.abs(wrap_angles(alternate[1:] - previous)).sum(axis=1)
+        # Each time the raw solution jumps branch, the filtered one switches too
+        branch = np.concatenate([[0], np.cumsum(jump < stay) % 2]).astype(bool)
+        filtered = np.unwrap(np.where(branch[:, None], alternate, rotations), axis=0)
+
+    if reference is not None and len(filtered):
+        turns = np.round((np.asarray(reference, dtype=float) - filtered[0]) / (2 * np.pi))
+        filtered += turns * 2 * np.pi
+    return filtered
+
+
+def convert_rotate_order(rotations, from_order, to_order):
+    """
+    Re-express (N,3) radian rotations in another rotate order, keeping the
+    same orientation on every frame. from_order can vary per frame.
+    """
+    rotations = np.asarray(rotations, dtype=float).reshape(-1, 3)
+    converted = matrix_to_euler(euler_to_matrix(rotations, from_order), to_order)
+    reference = rotations[0] if len(rotations) else None
+    return euler_filter(converted, to_order, reference=reference)
+
+
+def orthonormalize(matrices):
+    """
+    Split (N,3,3) matrices into (N,3,3) rotations and (N,3) scales, solving
+    shear along with scale: Gram-Schmidt on the rows, so that every matrix is
+    S * Sh * rotation with Maya's shear matrix. Mirrored matrices get a
+    negative scale on every axis.
+    """
+    rows = np.array(matrices, dtype=float).reshape(-1, 3, 3)
+    flip = np.where(np.linalg.det(rows) < 0, -1.0, 1.0)
+    scale = np.empty((len(rows), 3))
+    for i in range(3):
+        for j in range(i):
+            projection = np.einsum("ij,ij->i", rows[:, i], rows[:, j])
+            rows[:, i] -= projection[:, None] * rows[:, j]
+        scale[:, i] = np.linalg.norm(rows[:, i], axis=1)
+        rows[:, i] /= np.where(scale[:, i] == 0, 1.0, scale[:, i])[:, None]
+
+    return rows * flip[:, None, None], scale * flip[:, None]
+
+
+def decompose(
+    world_matrices,
+    parent_inverse_matrices,
+    rotate_order=0,
+    rotate_pivot=None,
+    scale_pivot=None,
+    joint_orient=None,
+    rotate_axis=None,
+    rotate_pivot_translate=None,
+    scale_pivot_translate=None,
+    inverse_scale=None,
+):
+    """
+    Solve local translate, rotate and scale for a stack of world matrices,
+    following Maya's transform matrix:
+    Sp^-1 * S * Sh * Sp * Spt * Rp^-1 * Ra * R * Jo * Rp * Rpt * Is * T
+
+    world_matrices and parent_inverse_matrices are sampled at the same frames.
+    Pivots and their translations are in the node's local space, rotate_axis
+    and joint_orient are in radians. inverse_scale is a joint's inverseScale,
+    (3,) or (N,3), given when its segmentScaleCompensate is on. The node's
+    shear is kept, it is solved along with the scale.
+    Returns (translate, rotate, scale) as (N,3) arrays, rotations in radians.
+    """
+    local = np.matmul(as_matrices(world_matrices), as_matrices(parent_inverse_matrices))
+    upper = local[:, :3, :3]
+
+    parent_scale = np.ones((len(local), 3))
+    if inverse_scale is not None:
+        parent_scale[:] = np.asarray(inverse_scale, dtype=float).reshape(-1, 3)
+    # Is is the inverse of the parent scale, taken off the columns
+    rotation, scale = orthonormalize(upper * parent_scale[:, None, :])
+
+    def vector(value):
+        return np.zeros(3) if value is None else np.asarray(value, dtype=float)
+
+    rp, sp = vector(rotate_pivot), vector(scale_pivot)
+    rpt, spt = vector(rotate_pivot_translate), vector(scale_pivot_translate)
+    translate = local[:, 3, :3] + np.matmul(sp, upper)
+    translate -= (np.matmul(sp + spt - rp, rotation) + rp + rpt) / parent_scale
+
+    if joint_orient is not None:
+        orient = euler_to_matrix([joint_orient])[0]
+        rotation = np.matmul(rotation, orient.T)
+    if rotate_axis is not None:
+        axis = euler_to_matrix([rotate_axis])[0]
+        rotation = np.matmul(axis.T, rotation)
+
+    rotate = euler_filter(matrix_to_euler(rotation, rotate_order), rotate_order)
+    return translate, rotate, scale
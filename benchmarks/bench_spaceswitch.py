@@ -0,0 +1,253 @@
+"""
+Benchmark SpaceSwitch outside of Maya.
+
+Runs spaceswitch.UI.refresh and spaceswitch.UI.apply_changes against the
+recording maya stand-in in benchmarks/stubs, on controls animated with
+10, 100, 1 000 and 10 000 keys. Wall time and the number of calls of every
+cmds function (and of the main API entry points) are reported per run, and
+every run checks that the switched controls kept their world pose and that
+a single undo restores both the enum and the baked keys.
+
+Needs NumPy. Run from the repository root:
+
+python benchmarks/bench_spaceswitch.py
+python benchmarks/bench_spaceswitch.py --sizes 10 100 --json results.json
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [os.path.join(HERE, "stubs"), os.path.dirname(HERE)]
+
+import numpy as np
+
+import maya.api.OpenMaya as om2
+import maya.api.OpenMayaAnim as oma2
+import maya.cmds as cmds
+import maya.mel as mel
+from maya.scene import AnimCurve, axis_rotation, scene, translation
+
+import aleha_tools.spaceswitch as spaceswitch
+
+
+SIZES = (10, 100, 1000, 10000)
+SPACES = ("world", "chest", "hand")
+
+
+def space_matrices():
+    # One moving parent per enum value, like constrained space groups
+    return [
+        lambda t: np.eye(4),
+        lambda t: axis_rotation(1, t * 0.01).dot(
+            translation(0.0, 10.0 + math.sin(t * 0.1), 0.0)
+        ),
+        lambda t: axis_rotation(0, t * 0.02).dot(
+            translation(5.0 * math.cos(t * 0.05), 12.0, 5.0 * math.sin(t * 0.05))
+        ),
+    ]
+
+
+def build_scene(keys, controls=1):
+    scene.reset()
+    names = []
+    for index in range(controls):
+        name = "ctrl{}".format(index)
+        node = scene.create_node(name)
+        node.add_attr("space", kind="enum", value=0, fields=list(SPACES))
+        node.space_attr = "space"
+        node.spaces = space_matrices()
+
+        node.attributes["space"].curve = AnimCurve(stepped=True)
+        node.attributes["space"].curve.set_key(1.0, 0.0)
+        for channel_index, channel in enumerate(node.CHANNELS):
+            curve = node.attributes[channel].curve = AnimCurve()
+            for frame in range(1, keys + 1):
+                if channel.startswith("scale"):
+                    value = 1.0 + 0.1 * math.sin(frame * 0.05)
+                elif channel.startswith("rotate"):
+                    value = math.sin(frame * 0.03 + channel_index) * 1.5
+                else:
+                    value = math.sin(frame * 0.02 + channel_index) * 10.0
+                curve.set_key(float(frame), value)
+        names.append(name)
+    scene.selection = names
+    scene.time = 1.0
+    return names
+
+
+def sample_frames(keys):
+    return sorted(set([1.0, float(keys), float(max(1, keys // 2)), float(max(1, keys // 3))]))
+
+
+def world_poses(names, frames):
+    return dict(
+        (name, [scene.world_matrix(scene.node(name), frame) for frame in frames])
+        for name in names
+    )
+
+
+def reset_calls():
+    for module in (cmds, mel, om2, oma2):
+        module.calls.clear()
+
+
+def collect_calls():
+    counts = dict(cmds.calls)
+    counts.update(("mel." + k, v) for k, v in mel.calls.items())
+    counts.update(om2.calls)
+    counts.update(oma2.calls)
+    return counts
+
+
+def make_ui():
+    # No network access from benchmarks
+    spaceswitch.UI.check_for_updates = lambda self, *args, **kwargs: None
+    ui = spaceswitch.UI()
+    ui.all_frames.setChecked(True)
+    return ui
+
+
+def run(case, keys, controls):
+    names = build_scene(keys, controls)
+    ui = make_ui()
+
+    reset_calls()
+    start = time.time()
+    ui.refresh()
+    refresh_time = time.time() - start
+    refresh_calls = collect_calls()
+    if ui.combobox.count() != len(SPACES):
+        raise RuntimeError("refresh did not fill the space dropdown")
+
+    # Clicking the same control again
+    reset_calls()
+    start = time.time()
+    ui.refresh()
+    warm_time = time.time() - start
+    warm_calls = collect_calls()
+
+    frames = sample_frames(keys)
+    before = world_poses(names, frames)
+
+    ui.combobox.setCurrentIndex(SPACES.index("hand"))
+    reset_calls()
+    start = time.time()
+    ui.apply_changes()
+    apply_time = time.time() - start
+    apply_calls = collect_calls()
+
+    after = world_poses(names, frames)
+    error = max(
+        float(np.abs(a - b).max())
+        for name in names
+        for a, b in zip(before[name], after[name])
+    )
+    switched = all(
+        scene.value(scene.node(name), "space", frames[-1]) == SPACES.index("hand")
+        for name in names
+    )
+
+    # One Ctrl+Z takes back the enum keys and the baked transform keys together
+    cmds.undo()
+    undone = world_poses(names, frames)
+    undo_error = max(
+        float(np.abs(a - b).max())
+        for name in names
+        for a, b in zip(before[name], undone[name])
+    )
+    undone_enum = all(
+        scene.value(scene.node(name), "space", frames[-1]) == 0 for name in names
+    )
+    undo_ok = undone_enum and undo_error < 1e-6
+    return {
+        "case": case,
+        "keys": keys,
+        "controls": controls,
+        "refresh_seconds": refresh_time,
+        "refresh_calls": refresh_calls,
+        "warm_refresh_seconds": warm_time,
+        "warm_refresh_calls": warm_calls,
+        "apply_seconds": apply_time,
+        "apply_calls": apply_calls,
+        "pose_error": error,
+        "switched": switched,
+        "undo_ok": undo_ok,
+    }
+
+
+def report(results):
+    header = "{:<8} {:>6} {:>12} {:>9} {:>12} {:>10} {:>10} {:>9} {:>6}".format(
+        "case",
+        "keys",
+        "refresh ms",
+        "warm ms",
+        "apply ms",
+        "cmds calls",
+        "pose err",
+        "switched",
+        "undo",
+    )
+    print(header)
+    print("-" * len(header))
+    for result in results:
+        # API and mel entries are qualified, cmds ones are not
+        cmds_calls = sum(
+            count for name, count in result["apply_calls"].items() if "." not in name
+        )
+        print(
+            "{:<8} {:>6} {:>12.2f} {:>9.2f} {:>12.2f} {:>10} {:>10.1e} {:>9} {:>6}".format(
+                result["case"],
+                result["keys"],
+                1000 * result["refresh_seconds"],
+                1000 * result["warm_refresh_seconds"],
+                1000 * result["apply_seconds"],
+                cmds_calls,
+                result["pose_error"],
+                "yes" if result["switched"] else "NO",
+                "ok" if result["undo_ok"] else "NO",
+            )
+        )
+
+    for result in results:
+        print("\n{} {} keys".format(result["case"], result["keys"]))
+        for phase in ("refresh", "warm_refresh", "apply"):
+            calls = result[phase + "_calls"]
+            print(
+                "  {:<12} {}".format(
+                    phase,
+                    ", ".join(
+                        "{} {}".format(name, calls[name])
+                        for name in sorted(calls, key=lambda n: (-calls[n], n))
+                    ),
+                )
+            )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--batch", type=int, default=3, help="Controls in the batch case.")
+    parser.add_argument("--json", help="Also write the results to this file.")
+    args = parser.parse_args(argv)
+
+    results = []
+    for keys in args.sizes:
+        results.append(run("single", keys, 1))
+        results.append(run("batch", keys, args.batch))
+    report(results)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0 if all(
+        r["switched"] and r["undo_ok"] and r["pose_error"] < 1e-6 for r in results
+    ) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,243 @@
+"""
+NumPy-only correctness checks for spaceswitch_tools.matrix_math.
+
+Covers Euler round-trips in every rotate order, rotate order conversion
+and the decomposition with pivots, pivot translations, rotate axis, shear,
+jointOrient and segmentScaleCompensate, without Maya. Run from the
+repository root:
+
+python benchmarks/check_matrix_math.py
+"""
+
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+import numpy as np
+
+from aleha_tools.spaceswitch_tools import matrix_math
+
+
+TOLERANCE = 1e-9
+FRAMES = 500
+
+
+def random_rotations(rng, rotate_order=0, count=FRAMES):
+    # Middle axis away from gimbal, where every order has a unique solution
+    rotations = rng.uniform(-np.pi, np.pi, (count, 3))
+    middle = matrix_math.ROTATE_ORDERS[rotate_order][1]
+    rotations[:, middle] = rng.uniform(-1.4, 1.4, count)
+    return rotations
+
+
+def smooth_rotations(count=FRAMES):
+    # Far enough from gimbal in every order, a whole turn off on Z
+    t = np.linspace(0.0, 4.0 * np.pi, count)
+    return np.stack(
+        [np.sin(t) * 0.9, np.cos(t * 0.7) * 0.6, np.sin(t * 1.3) * 0.8 + 2 * np.pi],
+        axis=1,
+    )
+
+
+def translation(t):
+    matrices = np.tile(np.eye(4), (len(t), 1, 1))
+    matrices[:, 3, :3] = t
+    return matrices
+
+
+def homogeneous(upper):
+    matrices = np.tile(np.eye(4), (len(upper), 1, 1))
+    matrices[:, :3, :3] = upper
+    return matrices
+
+
+def compose(
+    t,
+    r,
+    s,
+    rotate_order=0,
+    rotate_pivot=None,
+    scale_pivot=None,
+    joint_orient=None,
+    rotate_axis=None,
+    rotate_pivot_translate=None,
+    scale_pivot_translate=None,
+    shear=None,
+    inverse_scale=None,
+):
+    """
+    Maya's local matrix, built step by step:
+    Sp^-1 * S * Sh * Sp * Spt * Rp^-1 * Ra * R * Jo * Rp * Rpt * Is * T
+    """
+    count = len(t)
+
+    def offset(value, sign=1.0):
+        value = np.zeros(3) if value is None else np.asarray(value, float)
+        return translation(np.tile(sign * value, (count, 1)))
+
+    def rotation(value):
+        if value is None:
+            return np.eye(4)
+        return homogeneous(matrix_math.euler_to_matrix([value]))[0]
+
+    shear_matrix = np.eye(4)
+    if shear is not None:
+        xy, xz, yz = shear
+        shear_matrix[1, 0], shear_matrix[2, 0], shear_matrix[2, 1] = xy, xz, yz
+    parent_scale = np.ones((count, 3))
+    if inverse_scale is not None:
+        parent_scale[:] = np.asarray(inverse_scale, float).reshape(-1, 3)
+
+    matrices = offset(scale_pivot, -1.0)
+    for matrix in (
+        homogeneous(np.array([np.diag(v) for v in s])),
+        shear_matrix,
+        offset(scale_pivot),
+        offset(scale_pivot_translate),
+        offset(rotate_pivot, -1.0),
+        rotation(rotate_axis),
+        homogeneous(matrix_math.euler_to_matrix(r, rotate_order)),
+        rotation(joint_orient),
+        offset(rotate_pivot),
+        offset(rotate_pivot_translate),
+        homogeneous(np.array([np.diag(1.0 / v) for v in parent_scale])),
+        translation(t),
+    ):
+        matrices = np.matmul(matrices, matrix)
+    return matrices
+
+
+def check_euler_round_trip(rng):
+    error = 0.0
+    for order in range(6):
+        rotations = random_rotations(rng, order)
+        matrices = matrix_math.euler_to_matrix(rotations, order)
+        solved = matrix_math.matrix_to_euler(matrices, order)
+        error = max(error, np.abs(solved - rotations).max())
+        error = max(error, np.abs(matrix_math.euler_to_matrix(solved, order) - matrices).max())
+    return error
+
+
+def check_rotate_order_conversion(rng):
+    error = 0.0
+    rotations = smooth_rotations()
+    for from_order in range(6):
+        for to_order in range(6):
+            converted = matrix_math.convert_rotate_order(rotations, from_order, to_order)
+            same = np.abs(
+                matrix_math.euler_to_matrix(converted, to_order)
+                - matrix_math.euler_to_matrix(rotations, from_order)
+            ).max()
+            # Filtered curves stay continuous and start near the source
+            jumps = np.abs(np.diff(converted, axis=0)).max()
+            offset = np.abs(converted[0] - rotations[0]).max()
+            if jumps > 0.1 or offset > np.pi:
+                raise AssertionError(
+                    "{} -> {} jumps {:.3f} rad, starts {:.3f} rad off".format(
+                        from_order, to_order, jumps, offset
+                    )
+                )
+            error = max(error, same)
+
+    # Per frame source orders
+    orders = rng.integers(0, 6, FRAMES)
+    converted = matrix_math.convert_rotate_order(rotations, orders, 3)
+    error = max(
+        error,
+        np.abs(
+            matrix_math.euler_to_matrix(converted, 3)
+            - matrix_math.euler_to_matrix(rotations, orders)
+        ).max(),
+    )
+    return error
+
+
+# Transform attributes the decomposition has to respect, one case each and all
+# of them together
+DECOMPOSE_CASES = (
+    {},
+    {"rotate_pivot": [1.0, -2.0, 0.5], "scale_pivot": [0.3, 4.0, -1.0]},
+    {"rotate_axis": [0.3, -0.7, 1.2]},
+    {"rotate_pivot_translate": [2.0, 0.5, -1.5], "rotate_pivot": [1.0, 0.0, 0.5]},
+    {"scale_pivot_translate": [-0.5, 1.0, 3.0], "scale_pivot": [0.3, 4.0, -1.0]},
+    {"shear": [0.4, -0.2, 0.7]},
+    {
+        "rotate_pivot": [1.0, -2.0, 0.5],
+        "scale_pivot": [0.3, 4.0, -1.0],
+        "rotate_axis": [0.3, -0.7, 1.2],
+        "rotate_pivot_translate": [2.0, 0.5, -1.5],
+        "scale_pivot_translate": [-0.5, 1.0, 3.0],
+        "shear": [0.4, -0.2, 0.7],
+    },
+)
+
+
+def check_decompose(rng):
+    error = 0.0
+    t = rng.uniform(-20.0, 20.0, (FRAMES, 3))
+    r = matrix_math.euler_filter(random_rotations(rng) * 0.3)
+    s = rng.uniform(0.2, 3.0, (FRAMES, 3))
+    parents = compose(
+        rng.uniform(-5.0, 5.0, (FRAMES, 3)),
+        random_rotations(rng),
+        np.ones((FRAMES, 3)),
+    )
+    parent_inverses = np.linalg.inv(parents)
+
+    def solve(order=0, **attrs):
+        local = compose(t, r, s, order, **attrs)
+        # Shear is not solved for, the node keeps its own
+        shear = attrs.pop("shear", None)
+        solved = matrix_math.decompose(
+            np.matmul(local, parents), parent_inverses, order, **attrs
+        )
+        rebuilt = compose(solved[0], solved[1], solved[2], order, shear=shear, **attrs)
+        return max(
+            np.abs(rebuilt - local).max(),
+            np.abs(solved[0] - t).max(),
+            np.abs(solved[2] - s).max(),
+        )
+
+    for order in range(6):
+        for attrs in DECOMPOSE_CASES:
+            error = max(error, solve(order, **attrs))
+
+    # Joints: the orient is kept, only the rotation is solved. With
+    # segmentScaleCompensate, inverseScale follows the parent scale per frame
+    orient = [0.2, -0.4, 1.1]
+    inverse_scale = rng.uniform(0.5, 2.0, (FRAMES, 3))
+    error = max(error, solve(joint_orient=orient))
+    error = max(error, solve(joint_orient=orient, inverse_scale=inverse_scale))
+    return max(
+        error,
+        solve(joint_orient=orient, rotate_axis=[0.5, 0.1, -0.3], inverse_scale=[2.0, 1.0, 0.5]),
+    )
+
+
+CHECKS = (
+    ("euler round trip", check_euler_round_trip),
+    ("rotate order conversion", check_rotate_order_conversion),
+    ("decompose transforms", check_decompose),
+)
+
+
+def main():
+    rng = np.random.default_rng(7)
+    failed = False
+    for name, check in CHECKS:
+        try:
+            error = check(rng)
+        except AssertionError as e:
+            print("{:<26} FAIL {}".format(name, e))
+            failed = True
+            continue
+        ok = error < TOLERANCE
+        failed = failed or not ok
+        print("{:<26} {} max error {:.1e}".format(name, "ok  " if ok else "FAIL", error))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
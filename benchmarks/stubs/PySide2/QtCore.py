@@ -0,0 +1,163 @@
+"""
+QtCore stand-in.
+"""
+
+
+class Anything(object):
+    """Returned for every call and attribute the stand-in does not model."""
+
+    def __call__(self, *args, **kwargs):
+        return Anything()
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return Anything()
+
+    def __or__(self, other):
+        return self
+
+    __ror__ = __and__ = __xor__ = __or__
+
+    def __iter__(self):
+        return iter(())
+
+    def __int__(self):
+        return 0
+
+    __index__ = __int__
+
+    def __float__(self):
+        return 0.0
+
+
+class QObject(object):
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return Anything()
+
+
+class QPointF(object):
+    def __init__(self, x=0.0, y=0.0):
+        self._x, self._y = float(x), float(y)
+
+    def x(self):
+        return self._x
+
+    def y(self):
+        return self._y
+
+
+class QRect(object):
+    def __init__(self, x=0, y=0, width=0, height=0):
+        self.values = (int(x), int(y), int(width), int(height))
+
+    def __eq__(self, other):
+        return isinstance(other, QRect) and self.values == other.values
+
+    def __ne__(self, other):
+        return not self == other
+
+    def left(self):
+        return self.values[0]
+
+    def top(self):
+        return self.values[1]
+
+    def width(self):
+        return self.values[2]
+
+    def height(self):
+        return self.values[3]
+
+    def right(self):
+        return self.left() + self.width() - 1
+
+    def bottom(self):
+        return self.top() + self.height() - 1
+
+    def isEmpty(self):
+        return self.width() <= 0 or self.height() <= 0
+
+    def united(self, other):
+        if self.isEmpty():
+            return other
+        if other.isEmpty():
+            return self
+        left, top = min(self.left(), other.left()), min(self.top(), other.top())
+        right, bottom = max(self.right(), other.right()), max(self.bottom(), other.bottom())
+        return QRect(left, top, right - left + 1, bottom - top + 1)
+
+    def intersected(self, other):
+        left, top = max(self.left(), other.left()), max(self.top(), other.top())
+        right, bottom = min(self.right(), other.right()), min(self.bottom(), other.bottom())
+        return QRect(left, top, max(0, right - left + 1), max(0, bottom - top + 1))
+
+
+class QRectF(object):
+    def __init__(self, top_left, bottom_right):
+        self.top_left, self.bottom_right = top_left, bottom_right
+
+    def toAlignedRect(self):
+        import math
+
+        left, top = int(math.floor(self.top_left.x())), int(math.floor(self.top_left.y()))
+        right = int(math.ceil(self.bottom_right.x()))
+        bottom = int(math.ceil(self.bottom_right.y()))
+        return QRect(left, top, right - left, bottom - top)
+
+
+class Signal(object):
+    def __init__(self, *types):
+        self.slots = []
+
+    def connect(self, slot):
+        self.slots.append(slot)
+
+    def disconnect(self, *args):
+        self.slots = []
+
+    def emit(self, *args):
+        for slot in list(self.slots):
+            slot(*args)
+
+
+class QTimer(QObject):
+    def __init__(self, *args, **kwargs):
+        self.timeout = Signal()
+        self.active = False
+
+    def start(self, *args):
+        self.active = True
+
+    def stop(self):
+        self.active = False
+
+    def isActive(self):
+        return self.active
+
+    def setSingleShot(self, single_shot):
+        pass
+
+    def setInterval(self, interval):
+        pass
+
+    @staticmethod
+    def singleShot(msec, slot):
+        slot()
+
+
+Qt = Anything()
+
+
+_classes = {}
+
+
+def __getattr__(name):
+    if name.startswith("__"):
+        raise AttributeError(name)
+    return _classes.setdefault(name, type(name, (QObject,), {}))
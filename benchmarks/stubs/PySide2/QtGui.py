@@ -0,0 +1,14 @@
+"""
+QtGui stand-in, painting is a no-op.
+"""
+
+from PySide2.QtCore import QObject
+
+
+_classes = {}
+
+
+def __getattr__(name):
+    if name.startswith("__"):
+        raise AttributeError(name)
+    return _classes.setdefault(name, type(name, (QObject,), {}))
@@ -0,0 +1,265 @@
+"""
+QtWidgets stand-in.
+"""
+
+from PySide2 import QtCore
+from PySide2.QtCore import QObject, Signal
+
+
+class QWidget(QObject):
+    def __init__(self, *args, **kwargs):
+        parent = kwargs.get("parent", args[0] if args else None)
+        self._parent = parent if isinstance(parent, QWidget) else None
+        self._hidden = True
+        self._enabled = True
+
+    def show(self):
+        self._hidden = False
+
+    def hide(self):
+        self._hidden = True
+
+    def setVisible(self, visible):
+        self._hidden = not visible
+
+    def isHidden(self):
+        return self._hidden
+
+    def isVisible(self):
+        return not self._hidden
+
+    def setEnabled(self, enabled):
+        self._enabled = bool(enabled)
+
+    def isEnabled(self):
+        return self._enabled
+
+    def setParent(self, parent):
+        self._parent = parent
+
+    def parent(self):
+        return self._parent
+
+    # Fixed size, roughly a docked timeline
+    def width(self):
+        return 1000
+
+    def height(self):
+        return 30
+
+    def rect(self):
+        return QtCore.QRect(0, 0, self.width(), self.height())
+
+    def setGeometry(self, *args):
+        pass
+
+    def parent(self):
+        return self._parent
+
+    def width(self):
+        return 800
+
+    def height(self):
+        return 30
+
+
+class QMainWindow(QWidget):
+    pass
+
+
+class QDialog(QWidget):
+    pass
+
+
+class QFrame(QWidget):
+    HLine = 4
+    VLine = 5
+
+
+class QLabel(QWidget):
+    def __init__(self, text="", parent=None):
+        super(QLabel, self).__init__(parent)
+        self._text = text
+
+    def setText(self, text):
+        self._text = text
+
+    def text(self):
+        return self._text
+
+
+class QPushButton(QLabel):
+    def __init__(self, text="", parent=None):
+        super(QPushButton, self).__init__(text, parent)
+        self.clicked = Signal()
+
+
+class QComboBox(QWidget):
+    def __init__(self, parent=None):
+        super(QComboBox, self).__init__(parent)
+        self.items = []
+        self.index = -1
+        self.currentIndexChanged = Signal()
+
+    def clear(self):
+        self.items = []
+        self.index = -1
+
+    def addItem(self, text, data=None):
+        self.items.append((text, data))
+        if self.index < 0:
+            self.index = 0
+
+    def addItems(self, texts):
+        for text in texts:
+            self.addItem(text)
+
+    def count(self):
+        return len(self.items)
+
+    def setCurrentIndex(self, index):
+        self.index = index
+
+    def currentIndex(self):
+        return self.index
+
+    def currentText(self):
+        return self.items[self.index][0] if self.index >= 0 else ""
+
+    def currentData(self):
+        return self.items[self.index][1] if self.index >= 0 else None
+
+    def itemText(self, index):
+        return self.items[index][0]
+
+    def itemData(self, index):
+        return self.items[index][1]
+
+    def findData(self, data):
+        for index, item in enumerate(self.items):
+            if item[1] == data:
+                return index
+        return -1
+
+    def findText(self, text):
+        for index, item in enumerate(self.items):
+            if item[0] == text:
+                return index
+        return -1
+
+
+class QAction(QObject):
+    def __init__(self, text="", parent=None):
+        self._text = text
+        self._checked = False
+        self._enabled = True
+        self.triggered = Signal()
+        self.toggled = Signal()
+
+    def setCheckable(self, checkable):
+        pass
+
+    def setChecked(self, checked):
+        self._checked = bool(checked)
+
+    def isChecked(self):
+        return self._checked
+
+    def setEnabled(self, enabled):
+        self._enabled = bool(enabled)
+
+    def isEnabled(self):
+        return self._enabled
+
+    def text(self):
+        return self._text
+
+
+class QActionGroup(QObject):
+    def __init__(self, parent=None):
+        self.actions = []
+
+    def addAction(self, action):
+        self.actions.append(action)
+        return action
+
+
+class QMenu(QWidget):
+    def __init__(self, title="", parent=None):
+        super(QMenu, self).__init__(parent)
+        self.actions = []
+        self.aboutToShow = Signal()
+
+    def addAction(self, text):
+        action = text if isinstance(text, QAction) else QAction(text)
+        self.actions.append(action)
+        return action
+
+    def addMenu(self, title):
+        menu = QMenu(title)
+        self.actions.append(menu)
+        return menu
+
+    def addSeparator(self):
+        pass
+
+    def clear(self):
+        self.actions = []
+
+
+class QMenuBar(QMenu):
+    pass
+
+
+class QLayoutItem(object):
+    def __init__(self, item):
+        self.item = item
+
+    def widget(self):
+        return self.item if isinstance(self.item, QWidget) else None
+
+    def layout(self):
+        return self.item if isinstance(self.item, QLayout) else None
+
+
+class QLayout(QObject):
+    def __init__(self, parent=None):
+        self.items = []
+
+    def addWidget(self, widget, *args):
+        self.items.append(QLayoutItem(widget))
+
+    def addLayout(self, layout, *args):
+        self.items.append(QLayoutItem(layout))
+
+    def count(self):
+        return len(self.items)
+
+    def itemAt(self, index):
+        return self.items[index] if index < len(self.items) else None
+
+    def takeAt(self, index):
+        return self.items.pop(index)
+
+
+class QVBoxLayout(QLayout):
+    pass
+
+
+class QHBoxLayout(QLayout):
+    pass
+
+
+class QApplication(QObject):
+    @staticmethod
+    def processEvents(*args):
+        pass
+
+
+_classes = {}
+
+
+def __getattr__(name):
+    if name.startswith("__"):
+        raise AttributeError(name)
+    return _classes.setdefault(name, type(name, (QWidget,), {}))
@@ -0,0 +1,4 @@
+"""
+Headless PySide2 stand-in for benchmarks. Widgets keep the state the tools
+read back (text, checked, items, visibility), anything else is a no-op.
+"""
@@ -0,0 +1,19 @@
+"""
+maya.OpenMaya stand-in, only MGlobal messages.
+"""
+
+
+class MGlobal(object):
+    messages = []
+
+    @classmethod
+    def displayInfo(cls, message):
+        cls.messages.append(("info", message))
+
+    @classmethod
+    def displayWarning(cls, message):
+        cls.messages.append(("warning", message))
+
+    @classmethod
+    def displayError(cls, message):
+        cls.messages.append(("error", message))
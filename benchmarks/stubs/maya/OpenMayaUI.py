@@ -0,0 +1,21 @@
+"""
+maya.OpenMayaUI stand-in. Every control resolves to a fake pointer.
+"""
+
+
+class MQtUtil(object):
+    @staticmethod
+    def mainWindow():
+        return 1
+
+    @staticmethod
+    def findControl(name):
+        return 1
+
+    @staticmethod
+    def findLayout(name):
+        return 1
+
+    @staticmethod
+    def findMenuItem(name):
+        return 1
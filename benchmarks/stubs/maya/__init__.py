@@ -0,0 +1,4 @@
+"""
+Recording stand-in for the parts of Maya used by the tools, for benchmarks.
+Every node lives in maya.scene, see benchmarks/bench_spaceswitch.py.
+"""
@@ -0,0 +1,539 @@
+"""
+maya.api.OpenMaya stand-in over maya.scene.
+
+Covers plugs, DG context evaluation and MDGModifier. MTransformationMatrix
+and MEulerRotation only cover what the tools' no-NumPy decomposition uses,
+and borrow their Euler math from matrix_math.
+"""
+
+import collections
+
+import numpy as np
+
+from maya.scene import scene
+
+
+calls = collections.Counter()
+
+
+class MFn(object):
+    kTransform = 1
+    kJoint = 2
+    kAnimCurve = 3
+    kAttribute = 4
+    kEnumAttribute = 5
+
+
+class MSpace(object):
+    kTransform = 1
+    kWorld = 4
+
+
+class MObject(object):
+    def __init__(self, node=None, curve=None, matrix=None, attribute=None):
+        self.node = node
+        self.curve = curve
+        self.matrix = matrix
+        self.attribute = attribute
+
+    def hasFn(self, fn):
+        if self.attribute is not None:
+            if fn == MFn.kEnumAttribute:
+                return self.attribute.kind == "enum"
+            return fn == MFn.kAttribute
+        if fn == MFn.kAnimCurve:
+            return self.curve is not None
+        if fn == MFn.kJoint:
+            return self.node is not None and self.node.type == "joint"
+        return self.node is not None
+
+    def isNull(self):
+        return all(
+            value is None for value in (self.node, self.curve, self.matrix, self.attribute)
+        )
+
+
+class MUuid(object):
+    def __init__(self, value=""):
+        self.value = value
+
+    def asString(self):
+        return self.value
+
+
+class MDagPath(object):
+    def __init__(self, node=None):
+        self._node = node
+
+    def fullPathName(self):
+        return self._node.path()
+
+    def partialPathName(self):
+        return self._node.name
+
+    def node(self):
+        return MObject(self._node)
+
+
+class MSelectionList(object):
+    def __init__(self):
+        self.items = []
+
+    def add(self, name):
+        self.items.append(scene.node(name))
+        return self
+
+    def length(self):
+        return len(self.items)
+
+    def getDependNode(self, index):
+        return MObject(self.items[index])
+
+    def getDagPath(self, index):
+        return MDagPath(self.items[index])
+
+
+class MTime(object):
+    kFilm = 6
+
+    def __init__(self, value=0.0, unit=kFilm):
+        self.value = float(value)
+
+    @staticmethod
+    def uiUnit():
+        return MTime.kFilm
+
+    def asUnits(self, unit):
+        return self.value
+
+
+class MTimeArray(list):
+    pass
+
+
+class MDoubleArray(list):
+    pass
+
+
+class MDGContext(object):
+    def __init__(self, time=None):
+        self.time = time
+
+
+class MDGContextGuard(object):
+    def __init__(self, context):
+        self.context = context
+
+    def __enter__(self):
+        scene.time_stack.append(self.context.time.value)
+        return self
+
+    def __exit__(self, *args):
+        scene.time_stack.pop()
+        return False
+
+
+class NoContext(object):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+class MMatrix(object):
+    def __init__(self, values=None):
+        if values is None:
+            values = np.eye(4)
+        self.array = np.asarray(list(values), float).reshape(4, 4)
+
+    def __iter__(self):
+        return iter(self.array.flat)
+
+    def __getitem__(self, index):
+        return self.array.flat[index]
+
+    def __mul__(self, other):
+        return MMatrix(self.array.dot(other.array))
+
+    def inverse(self):
+        return MMatrix(np.linalg.inv(self.array))
+
+    def transpose(self):
+        return MMatrix(self.array.T)
+
+
+class MPoint(list):
+    def __init__(self, x=0.0, y=0.0, z=0.0, w=1.0):
+        super(MPoint, self).__init__([x, y, z, w])
+
+
+class MVector(list):
+    def __init__(self, x=0.0, y=0.0, z=0.0):
+        super(MVector, self).__init__([x, y, z])
+
+
+class MEulerRotation(list):
+    def __init__(self, x=0.0, y=0.0, z=0.0, order=0):
+        super(MEulerRotation, self).__init__([x, y, z])
+        self.order = order
+
+    def asMatrix(self):
+        from aleha_tools.spaceswitch_tools import matrix_math
+
+        matrix = np.eye(4)
+        matrix[:3, :3] = matrix_math.euler_to_matrix([list(self)], self.order)[0]
+        return MMatrix(matrix)
+
+    def reorder(self, order):
+        from aleha_tools.spaceswitch_tools import matrix_math
+
+        rotation = self.asMatrix().array[:3, :3]
+        return MEulerRotation(*matrix_math.matrix_to_euler(rotation, order)[0], order=order)
+
+    def closestSolution(self, other):
+        from aleha_tools.spaceswitch_tools import matrix_math
+
+        rotations = matrix_math.euler_filter([list(other), list(self)], self.order)
+        return MEulerRotation(*rotations[1], order=self.order)
+
+
+class MTransformationMatrix(object):
+    def __init__(self, matrix=None):
+        self.matrix = matrix or MMatrix()
+
+    def rotation(self):
+        from aleha_tools.spaceswitch_tools import matrix_math
+
+        return MEulerRotation(*matrix_math.matrix_to_euler(self.matrix.array[:3, :3])[0])
+
+
+class MFnMatrixData(object):
+    def __init__(self, obj=None):
+        self.obj = obj
+
+    def matrix(self):
+        return MMatrix(self.obj.matrix.flat)
+
+
+# World space matrices evaluated by the scene instead of stored attributes
+MATRIX_PLUGS = {
+    "worldMatrix": lambda node: scene.world_matrix(node),
+    "parentMatrix": lambda node: scene.parent_matrix(node),
+    "parentInverseMatrix": lambda node: np.linalg.inv(scene.parent_matrix(node)),
+    "matrix": lambda node: scene.local_matrix(node),
+}
+
+
+class MPlug(object):
+    def __init__(self, node=None, attr=None, curve=None, element=False):
+        self._node = node
+        self.attr = attr
+        self.curve = curve
+        self.element = element
+
+    def name(self):
+        return "{}.{}".format(self._node.name, self.attr)
+
+    def __eq__(self, other):
+        return (
+            isinstance(other, MPlug)
+            and self._node is other._node
+            and self.attr == other.attr
+            and self.curve is other.curve
+        )
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = object.__hash__
+
+    def partialName(self, *args, **kwargs):
+        return self.attr
+
+    @property
+    def scene_attribute(self):
+        return self._node.attributes[self.attr]
+
+    def attribute(self):
+        return MObject(attribute=self.scene_attribute)
+
+    @property
+    def isArray(self):
+        return self.attr in MATRIX_PLUGS and not self.element
+
+    def elementByLogicalIndex(self, index):
+        return MPlug(self._node, self.attr, element=True)
+
+    @property
+    def isLocked(self):
+        return self.scene_attribute.locked
+
+    @property
+    def isKeyable(self):
+        return self.scene_attribute.keyable
+
+    @property
+    def isDestination(self):
+        return self.scene_attribute.curve is not None
+
+    def node(self):
+        if self.curve is not None:
+            return MObject(curve=self.curve)
+        return MObject(self._node)
+
+    def connectedTo(self, asDst, asSrc):
+        calls["MPlug.connectedTo"] += 1
+        if asDst and self.attr not in MATRIX_PLUGS:
+            curve = self.scene_attribute.curve
+            if curve is not None:
+                return [MPlug(curve=curve)]
+        return []
+
+    def asMObject(self, context=None):
+        calls["MPlug.asMObject"] += 1
+        with MDGContextGuard(context) if context else NoContext():
+            return MObject(matrix=MATRIX_PLUGS[self.attr](self._node))
+
+    def asDouble(self, context=None):
+        calls["MPlug.asDouble"] += 1
+        with MDGContextGuard(context) if context else NoContext():
+            return float(scene.value(self._node, self.attr))
+
+    def asInt(self):
+        calls["MPlug.asInt"] += 1
+        return int(round(scene.value(self._node, self.attr)))
+
+    def asBool(self):
+        return bool(self.asInt())
+
+
+class MFnDependencyNode(object):
+    def __init__(self, obj=None):
+        self.obj = obj
+
+    def name(self):
+        return self.obj.node.name
+
+    @property
+    def typeName(self):
+        return self.obj.node.type
+
+    def uuid(self):
+        return MUuid(self.obj.node.uuid)
+
+    def hasAttribute(self, attr):
+        return attr in self.obj.node.attributes or attr in MATRIX_PLUGS
+
+    def attributeCount(self):
+        return len(self.obj.node.attributes)
+
+    def attribute(self, index):
+        return MObject(attribute=list(self.obj.node.attributes.values())[index])
+
+    def findPlug(self, attr, wantNetworkedPlug=False):
+        calls["MFnDependencyNode.findPlug"] += 1
+        node = self.obj.node
+        if isinstance(attr, MObject):
+            attr = attr.attribute.name
+        if attr not in node.attributes and attr not in MATRIX_PLUGS:
+            raise RuntimeError("(kInvalidParameter): No element at given index")
+        return MPlug(node, attr)
+
+
+class MFnAttribute(object):
+    def __init__(self, obj=None):
+        self.obj = obj
+
+    @property
+    def name(self):
+        return self.obj.attribute.name
+
+    @property
+    def array(self):
+        return False
+
+    @property
+    def keyable(self):
+        return self.obj.attribute.keyable
+
+
+class MFnEnumAttribute(MFnAttribute):
+    def getMin(self):
+        return min(value for name, value in self.obj.attribute.fields)
+
+    def getMax(self):
+        return max(value for name, value in self.obj.attribute.fields)
+
+    def fieldName(self, value):
+        for name, field_value in self.obj.attribute.fields:
+            if field_value == value:
+                return name
+        raise RuntimeError("(kInvalidParameter): Object does not exist")
+
+    def fieldValue(self, name):
+        return dict(self.obj.attribute.fields)[name]
+
+
+class MFnTransform(MFnDependencyNode):
+    def __init__(self, dag_path=None):
+        super(MFnTransform, self).__init__(dag_path.node())
+
+    def rotatePivot(self, space):
+        return MPoint()
+
+    def scalePivot(self, space):
+        return MPoint()
+
+    def rotatePivotTranslation(self, space):
+        return MVector()
+
+    def scalePivotTranslation(self, space):
+        return MVector()
+
+    def object(self):
+        return self.obj
+
+
+class MDGModifier(object):
+    """Queues plug values and curve connections until doIt, like Maya does."""
+
+    def __init__(self):
+        self.pending = []
+        self.done = []
+
+    def newPlugValueDouble(self, plug, value):
+        self.pending.append(("value", plug, float(value)))
+        return self
+
+    def newPlugValueInt(self, plug, value):
+        self.pending.append(("value", plug, int(value)))
+        return self
+
+    def connect_curve(self, plug, curve):
+        self.pending.append(("curve", plug, curve))
+
+    def doIt(self):
+        calls["MDGModifier.doIt"] += 1
+        for kind, plug, value in self.pending:
+            attribute = plug.scene_attribute
+            if kind == "value":
+                self.done.append((kind, attribute, attribute.value))
+                attribute.value = value
+            else:
+                self.done.append((kind, attribute, attribute.curve))
+                attribute.curve = value
+        self.pending = []
+
+    def undoIt(self):
+        for kind, attribute, previous in reversed(self.done):
+            if kind == "value":
+                attribute.value = previous
+            else:
+                attribute.curve = previous
+        self.pending = []
+
+
+class MPxCommand(object):
+    def doIt(self, args):
+        pass
+
+    def undoIt(self):
+        pass
+
+    def redoIt(self):
+        pass
+
+    def isUndoable(self):
+        return False
+
+
+class MFnPlugin(object):
+    def __init__(self, obj=None, vendor="", version="", apiVersion=""):
+        pass
+
+    def registerCommand(self, name, command_class, syntax=None):
+        import maya.cmds as cmds
+
+        scene.commands[name] = command_class
+        cmds._register_command(name)
+
+    def deregisterCommand(self, name):
+        scene.commands.pop(name, None)
+
+
+class MMessage(object):
+    removers = {}
+    next_id = [0]
+
+    @classmethod
+    def add(cls, registry, callback):
+        cls.next_id[0] += 1
+        callback_id = cls.next_id[0]
+        registry[callback_id] = callback
+        cls.removers[callback_id] = lambda: registry.pop(callback_id, None)
+        return callback_id
+
+    @classmethod
+    def removeCallback(cls, callback_id):
+        remover = cls.removers.pop(callback_id, None)
+        if remover is not None:
+            remover()
+
+    @classmethod
+    def removeCallbacks(cls, callback_ids):
+        for callback_id in callback_ids:
+            cls.removeCallback(callback_id)
+
+
+class MEventMessage(MMessage):
+    @classmethod
+    def addEventCallback(cls, event, function, clientData=None):
+        calls["MEventMessage.addEventCallback"] += 1
+        registry = scene.event_callbacks.setdefault(event, {})
+        return cls.add(registry, lambda: function(clientData))
+
+
+class MDGMessage(MMessage):
+    @classmethod
+    def addTimeChangeCallback(cls, function, clientData=None):
+        calls["MDGMessage.addTimeChangeCallback"] += 1
+        registry = scene.event_callbacks.setdefault("timeChanged", {})
+        return cls.add(registry, lambda: function(MTime(scene.time), clientData))
+
+
+class MNodeMessage(MMessage):
+    kConnectionMade = 0x01
+    kAttributeSet = 0x08
+    kAttributeAdded = 0x40
+    kAttributeRemoved = 0x80
+
+    @classmethod
+    def addAttributeAddedOrRemovedCallback(cls, obj, function, clientData=None):
+        calls["MNodeMessage.addAttributeAddedOrRemovedCallback"] += 1
+        node = obj.node
+
+        def callback(attr, added):
+            message = cls.kAttributeAdded if added else cls.kAttributeRemoved
+            function(message, MPlug(node, attr), clientData)
+
+        return cls.add(node.attribute_callbacks, callback)
+
+    @classmethod
+    def addAttributeChangedCallback(cls, obj, function, clientData=None):
+        calls["MNodeMessage.addAttributeChangedCallback"] += 1
+        node = obj.node
+
+        def callback(attr):
+            function(cls.kAttributeSet, MPlug(node, attr), MPlug(), clientData)
+
+        return cls.add(node.changed_callbacks, callback)
+
+
+class MGlobal(object):
+    @staticmethod
+    def getActiveSelectionList(orderedSelectionIfAvailable=False):
+        sel = MSelectionList()
+        for name in scene.selection:
+            sel.add(name)
+        return sel
@@ -0,0 +1,105 @@
+"""
+maya.api.OpenMayaAnim stand-in over maya.scene anim curves.
+"""
+
+import collections
+
+from maya.api.OpenMaya import MObject, MTime
+from maya.scene import AnimCurve
+
+calls = collections.Counter()
+
+
+class MAnimCurveChange(object):
+    """Keeps the previous value of every edited key so it can be undone."""
+
+    def __init__(self):
+        self.edits = []
+
+    def record(self, curve, time, previous, value):
+        self.edits.append((curve, time, previous, value))
+
+    def undoIt(self):
+        for curve, time, previous, value in reversed(self.edits):
+            if previous is None:
+                curve.remove_key(time)
+            else:
+                curve.set_key(time, previous)
+
+    def redoIt(self):
+        for curve, time, previous, value in self.edits:
+            if value is None:
+                curve.remove_key(time)
+            else:
+                curve.set_key(time, value)
+
+
+class MFnAnimCurve(object):
+    kTangentGlobal = 0
+    kTangentLinear = 2
+    kTangentStep = 11
+
+    kAnimCurveTA = 0
+    kAnimCurveTL = 1
+    kAnimCurveTU = 3
+
+    def __init__(self, obj=None):
+        self.curve = None
+        if obj is not None:
+            self.setObject(obj)
+
+    def setObject(self, obj):
+        self.curve = obj.curve
+
+    def object(self):
+        return MObject(curve=self.curve)
+
+    def timedAnimCurveTypeForPlug(self, plug):
+        return self.kAnimCurveTU if plug.scene_attribute.kind == "enum" else self.kAnimCurveTL
+
+    def create(self, plug, curve_type=None, modifier=None):
+        calls["MFnAnimCurve.create"] += 1
+        self.curve = AnimCurve(stepped=plug.scene_attribute.kind in ("enum", "bool"))
+        if modifier is not None:
+            modifier.connect_curve(plug, self.curve)
+        else:
+            plug.scene_attribute.curve = self.curve
+        return self.object()
+
+    @property
+    def numKeys(self):
+        return len(self.curve.keys)
+
+    def input(self, index):
+        return MTime(self.curve.times()[index])
+
+    def value(self, index):
+        return self.curve.keys[self.curve.times()[index]]
+
+    def addKeys(
+        self,
+        times,
+        values,
+        tangentInType=kTangentGlobal,
+        tangentOutType=kTangentGlobal,
+        keepExistingKeys=False,
+        change=None,
+    ):
+        calls["MFnAnimCurve.addKeys"] += 1
+        if not keepExistingKeys:
+            for time in list(self.curve.keys):
+                if change is not None:
+                    change.record(self.curve, time, self.curve.keys[time], None)
+                self.curve.remove_key(time)
+        for time, value in zip(times, values):
+            time = time.value
+            if change is not None:
+                change.record(self.curve, time, self.curve.keys.get(time), value)
+            self.curve.set_key(time, value)
+
+    def remove(self, index, change=None):
+        calls["MFnAnimCurve.remove"] += 1
+        time = self.curve.times()[index]
+        if change is not None:
+            change.record(self.curve, time, self.curve.keys[time], None)
+        self.curve.remove_key(time)
@@ -0,0 +1,336 @@
+"""
+maya.cmds stand-in. Every command call is counted in calls.
+"""
+
+import collections
+import functools
+import importlib.util
+import os
+import sys
+
+from maya.scene import AnimCurve, scene
+
+
+calls = collections.Counter()
+
+
+def _flag(kwargs, *names):
+    for name in names:
+        if name in kwargs:
+            return kwargs[name]
+
+
+def _attr_node(obj, kwargs):
+    node = kwargs.get("node") or kwargs.get("n")
+    return scene.node(node), obj
+
+
+# Selection and time
+def ls(*args, **kwargs):
+    if _flag(kwargs, "selection", "sl"):
+        return list(scene.selection)
+    names = []
+    for arg in args:
+        names.extend([arg] if isinstance(arg, str) else arg)
+    node_type = _flag(kwargs, "type", "typ")
+    return [
+        name
+        for name, node in scene.nodes.items()
+        if (not args or name in names)
+        and (not node_type or node.type == node_type or node_type == "transform")
+    ]
+
+
+def referenceQuery(obj, **kwargs):
+    if obj.startswith("RN|"):
+        path = obj[3:]
+        if _flag(kwargs, "nodes", "n"):
+            return [name for name, node in scene.nodes.items() if node.reference == path]
+        return path
+    node = scene.node(obj)
+    if _flag(kwargs, "isNodeReferenced", "inr"):
+        return node.reference is not None
+    if node.reference is None:
+        raise RuntimeError("'{}' is not from a referenced file.".format(obj))
+    if _flag(kwargs, "filename", "f"):
+        return node.reference
+    if _flag(kwargs, "referenceNode", "rfn"):
+        return "RN|" + node.reference
+    if _flag(kwargs, "namespace", "ns"):
+        return ":" + node.name.rpartition(":")[0]
+
+
+def select(*args, **kwargs):
+    if _flag(kwargs, "clear", "cl"):
+        scene.selection = []
+    else:
+        scene.selection = [scene.node(name).name for name in args]
+    scene.emit("SelectionChanged")
+
+
+def currentTime(*args, **kwargs):
+    if _flag(kwargs, "query", "q"):
+        return scene.time
+    scene.time = float(args[0])
+    scene.emit("timeChanged")
+    return scene.time
+
+
+def playbackOptions(*args, **kwargs):
+    if _flag(kwargs, "query", "q"):
+        if _flag(kwargs, "minTime", "min", "animationStartTime", "ast"):
+            return scene.start
+        return scene.end
+
+
+def play(*args, **kwargs):
+    if _flag(kwargs, "query", "q"):
+        return scene.playing
+    scene.playing = bool(_flag(kwargs, "state", "st"))
+
+
+def timeControl(*args, **kwargs):
+    if _flag(kwargs, "rangeVisible", "rv"):
+        return False
+    if _flag(kwargs, "rangeArray", "ra"):
+        return [scene.time, scene.time + 1]
+
+
+# Attributes
+def listAttr(obj, **kwargs):
+    node = scene.node(obj)
+    if _flag(kwargs, "userDefined", "ud"):
+        return [a.name for a in node.attributes.values() if a.dynamic] or None
+    if _flag(kwargs, "channelBox", "cb"):
+        return [
+            a.name for a in node.attributes.values() if not a.keyable and a.kind != "enum"
+        ]
+    keyable, unlocked = _flag(kwargs, "keyable", "k"), _flag(kwargs, "unlocked", "u")
+    return [
+        a.name
+        for a in node.attributes.values()
+        if (not keyable or a.keyable) and (not unlocked or not a.locked)
+    ] or None
+
+
+def listAnimatable(obj):
+    node = scene.node(obj)
+    return [
+        "{}.{}".format(node.path(), a.name)
+        for a in node.attributes.values()
+        if a.keyable
+    ]
+
+
+def attributeQuery(attr, **kwargs):
+    node, attr = _attr_node(attr, kwargs)
+    if _flag(kwargs, "exists", "ex"):
+        return attr in node.attributes
+    attribute = node.attributes[attr]
+    if _flag(kwargs, "attributeType", "at"):
+        return attribute.kind
+    if _flag(kwargs, "listEnum", "le"):
+        fields, next_value = [], 0
+        for name, value in attribute.fields:
+            fields.append(name if value == next_value else "{}={}".format(name, value))
+            next_value = value + 1
+        return [":".join(fields)]
+
+
+def getAttr(attr, **kwargs):
+    node, attr = scene.split(attr)
+    return scene.value(node, attr, kwargs.get("time", kwargs.get("t")))
+
+
+def setAttr(attr, *values, **kwargs):
+    node, attr = scene.split(attr)
+    scene.set_value(node, attr, float(values[0]))
+
+
+def xform(obj, **kwargs):
+    node = scene.node(obj)
+    if _flag(kwargs, "query", "q"):
+        return [float(v) for v in scene.world_matrix(node).flat]
+    matrix = _flag(kwargs, "matrix", "m")
+    if matrix is not None:
+        scene.set_world_matrix(node, matrix)
+
+
+def keyframe(*args, **kwargs):
+    nodes = [scene.node(name) for name in args] or [
+        scene.node(name) for name in scene.selection
+    ]
+    attrs = _flag(kwargs, "attribute", "at")
+    if attrs and not isinstance(attrs, (list, tuple)):
+        attrs = [attrs]
+    times = []
+    for node in nodes:
+        for attribute in node.attributes.values():
+            if attribute.curve and (not attrs or attribute.name in attrs):
+                times.extend(attribute.curve.times())
+    return times or None
+
+
+def addAttr(obj, **kwargs):
+    node = scene.node(obj)
+    name = _flag(kwargs, "longName", "ln")
+    kind = _flag(kwargs, "attributeType", "at") or "double"
+    fields = _flag(kwargs, "enumName", "en")
+    node.add_attr(
+        name,
+        kind=kind,
+        fields=_enum_fields(fields) if fields else None,
+        keyable=bool(_flag(kwargs, "keyable", "k")),
+    )
+
+
+def _enum_fields(text):
+    fields, value = [], 0
+    for field in text.split(":"):
+        name, _, explicit = field.partition("=")
+        value = int(explicit) if explicit else value
+        fields.append((name, value))
+        value += 1
+    return fields
+
+
+def deleteAttr(attr, **kwargs):
+    node, attr = scene.split(attr)
+    node.delete_attr(attr)
+
+
+def setKeyframe(attr, **kwargs):
+    node, attr = scene.split(attr)
+    attribute = node.attributes[attr]
+    if not attribute.curve:
+        attribute.curve = AnimCurve(stepped=attribute.kind in ("enum", "bool"))
+    time = kwargs.get("time", kwargs.get("t", scene.time))
+    value = kwargs.get("value", kwargs.get("v", scene.value(node, attr, time)))
+    attribute.curve.set_key(float(time), float(value))
+
+
+# Environment
+def about(*args, **kwargs):
+    return "2024"
+
+
+def evaluationManager(*args, **kwargs):
+    if _flag(kwargs, "query", "q"):
+        return ["parallel"]
+
+
+def evaluator(*args, **kwargs):
+    if _flag(kwargs, "query", "q"):
+        return False
+
+
+def autoKeyframe(*args, **kwargs):
+    if _flag(kwargs, "query", "q"):
+        return False
+
+
+def cycleCheck(*args, **kwargs):
+    if _flag(kwargs, "query", "q"):
+        return True
+
+
+def refresh(*args, **kwargs):
+    pass
+
+
+def progressBar(*args, **kwargs):
+    if _flag(kwargs, "query", "q"):
+        return False
+
+
+# Undo queue of the plugin commands, the only writes the stand-in can undo.
+# Every entry is a list of commands, one per closed chunk or lone command.
+_undo_queue = []
+_chunks = []
+
+
+def undoInfo(*args, **kwargs):
+    if _flag(kwargs, "openChunk", "ock"):
+        _chunks.append([])
+    elif _flag(kwargs, "closeChunk", "cck") and _chunks:
+        chunk = _chunks.pop()
+        if _chunks:
+            _chunks[-1].extend(chunk)
+        elif chunk:
+            _undo_queue.append(chunk)
+
+
+def undo(*args, **kwargs):
+    if _undo_queue:
+        for command in reversed(_undo_queue.pop()):
+            command.undoIt()
+
+
+_jobs = [0]
+
+
+def scriptJob(*args, **kwargs):
+    if _flag(kwargs, "kill", "k") is None:
+        _jobs[0] += 1
+        return _jobs[0]
+
+
+def inViewMessage(*args, **kwargs):
+    pass
+
+
+def warning(*args, **kwargs):
+    pass
+
+
+def evalDeferred(*args, **kwargs):
+    pass
+
+
+def confirmDialog(*args, **kwargs):
+    return kwargs.get("cancelButton")
+
+
+# Plugins: commands registered by a plugin become functions of this module
+def pluginInfo(name, **kwargs):
+    return name in scene.plugins
+
+
+def loadPlugin(path, **kwargs):
+    name = os.path.splitext(os.path.basename(path))[0]
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    module.initializePlugin(None)
+    scene.plugins.add(name)
+    return [name]
+
+
+def _run_command(name, *args, **kwargs):
+    command = scene.commands[name]()
+    command.doIt(args)
+    if command.isUndoable():
+        if _chunks:
+            _chunks[-1].append(command)
+        else:
+            _undo_queue.append([command])
+    return None
+
+
+def _register_command(name):
+    setattr(sys.modules[__name__], name, _counted(functools.partial(_run_command, name), name))
+
+
+def _counted(function, name):
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        calls[name] += 1
+        return function(*args, **kwargs)
+
+    return wrapper
+
+
+for _name, _function in list(globals().items()):
+    if callable(_function) and not _name.startswith("_") and _name[0].islower():
+        if getattr(_function, "__module__", None) == __name__:
+            globals()[_name] = _counted(_function, _name)
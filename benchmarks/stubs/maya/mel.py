@@ -0,0 +1,19 @@
+"""
+maya.mel stand-in, knows the global UI names the tools ask for.
+"""
+
+import collections
+
+
+calls = collections.Counter()
+
+GLOBALS = {
+    "$gMainProgressBar": "MainProgressBar",
+    "$gPlayBackSlider": "MainPlayBackSlider",
+}
+
+
+def eval(command):
+    calls["eval"] += 1
+    name = command.rpartition("=")[-1].strip().rstrip(";")
+    return GLOBALS.get(name)
@@ -0,0 +1,258 @@
+"""
+In-memory scene behind the maya stand-in.
+
+Simulates transforms with keyable attributes, enum attributes, anim curves
+and time dependent world matrices. A node can get "spaces": one parent
+matrix function per value of an enum attribute, which is what SpaceSwitch
+rigs do with constraints.
+"""
+
+import bisect
+import itertools
+import math
+
+import numpy as np
+
+
+def translation(x, y, z):
+    matrix = np.eye(4)
+    matrix[3, :3] = x, y, z
+    return matrix
+
+
+def axis_rotation(axis, angle):
+    matrix = np.eye(4)
+    i, j = [a for a in range(3) if a != axis]
+    sign = 1.0 if axis != 1 else -1.0
+    cos, sin = math.cos(angle), math.sin(angle)
+    matrix[i, i] = matrix[j, j] = cos
+    matrix[i, j] = sign * sin
+    matrix[j, i] = -sign * sin
+    return matrix
+
+
+ROTATE_ORDERS = ((0, 1, 2), (1, 2, 0), (2, 0, 1), (0, 2, 1), (1, 0, 2), (2, 1, 0))
+
+_uuids = itertools.count(1)
+
+
+class AnimCurve(object):
+    def __init__(self, stepped=False):
+        self.keys = {}
+        self.stepped = stepped
+        self._times = None
+
+    def times(self):
+        if self._times is None:
+            self._times = sorted(self.keys)
+        return self._times
+
+    def set_key(self, time, value):
+        if time not in self.keys:
+            self._times = None
+        self.keys[time] = value
+
+    def remove_key(self, time):
+        del self.keys[time]
+        self._times = None
+
+    def evaluate(self, time):
+        times = self.times()
+        if not times:
+            return 0.0
+        index = bisect.bisect_right(times, time)
+        if index == 0:
+            return self.keys[times[0]]
+        if index == len(times) or self.stepped:
+            return self.keys[times[index - 1]]
+        start, end = times[index - 1], times[index]
+        weight = (time - start) / float(end - start)
+        return self.keys[start] + (self.keys[end] - self.keys[start]) * weight
+
+
+class Attribute(object):
+    def __init__(
+        self, name, kind="double", value=0.0, fields=None, keyable=True, dynamic=True
+    ):
+        self.name = name
+        self.dynamic = dynamic
+        self.kind = kind
+        self.value = value
+        # Enum fields as (name, value), plain names take their index
+        self.fields = None
+        if fields is not None:
+            self.fields = [
+                (f, i) if isinstance(f, str) else tuple(f) for i, f in enumerate(fields)
+            ]
+        self.keyable = keyable
+        self.locked = False
+        self.curve = None
+
+
+class Node(object):
+    CHANNELS = [a + x for a in ("translate", "rotate", "scale") for x in "XYZ"]
+
+    def __init__(self, name, node_type="transform", parent=None):
+        self.name = name
+        self.type = node_type
+        self.parent = parent
+        self.reference = None
+        self.uuid = "{:08X}-0000-0000-0000-000000000000".format(next(_uuids))
+        self.attributes = {}
+        self.attribute_callbacks = {}
+        self.changed_callbacks = {}
+        self.spaces = None
+        self.space_attr = None
+        for channel in self.CHANNELS:
+            self.add_attr(
+                channel, value=1.0 if channel.startswith("scale") else 0.0, dynamic=False
+            )
+        self.add_attr(
+            "rotateOrder",
+            kind="enum",
+            value=0,
+            fields=["xyz", "yzx", "zxy", "xzy", "yxz", "zyx"],
+            keyable=False,
+            dynamic=False,
+        )
+        self.add_attr("visibility", kind="bool", value=1.0, dynamic=False)
+        for axis in "XYZ":
+            self.add_attr("rotateAxis" + axis, keyable=False, dynamic=False)
+
+    def add_attr(self, name, **kwargs):
+        self.attributes[name] = Attribute(name, **kwargs)
+        for callback in list(self.attribute_callbacks.values()):
+            callback(name, True)
+        return self.attributes[name]
+
+    def delete_attr(self, name):
+        for callback in list(self.attribute_callbacks.values()):
+            callback(name, False)
+        del self.attributes[name]
+
+    def path(self):
+        prefix = self.parent.path() if self.parent else ""
+        return prefix + "|" + self.name
+
+
+class Scene(object):
+    def __init__(self):
+        self.nodes = {}
+        self.selection = []
+        self.time = 1.0
+        self.time_stack = []
+        self.playing = False
+        self.event_callbacks = {}
+        self.start, self.end = 1.0, 120.0
+        self.commands = {}
+        self.plugins = set()
+
+    def reset(self):
+        self.__init__()
+
+    # Nodes
+    def create_node(self, name, node_type="transform", parent=None):
+        parent = self.node(parent) if parent else None
+        node = self.nodes[name] = Node(name, node_type, parent)
+        if node_type == "joint":
+            for axis in "XYZ":
+                node.add_attr("jointOrient" + axis, keyable=False, dynamic=False)
+                node.add_attr(
+                    "inverseScale" + axis, value=1.0, keyable=False, dynamic=False
+                )
+            node.add_attr(
+                "segmentScaleCompensate",
+                kind="bool",
+                value=1.0,
+                keyable=False,
+                dynamic=False,
+            )
+        return node
+
+    def node(self, name):
+        name = name.split("|")[-1]
+        if name not in self.nodes:
+            raise ValueError("No object matches name: {}".format(name))
+        return self.nodes[name]
+
+    def split(self, attr_path):
+        node, attr = attr_path.split(".", 1)
+        return self.node(node), attr
+
+    # Evaluation
+    def now(self):
+        return self.time_stack[-1] if self.time_stack else self.time
+
+    def value(self, node, attr, time=None):
+        attribute = node.attributes[attr]
+        if attribute.curve:
+            return attribute.curve.evaluate(self.now() if time is None else time)
+        return attribute.value
+
+    def local_matrix(self, node, time=None):
+        v = dict((c, self.value(node, c, time)) for c in Node.CHANNELS)
+        scale = np.diag([v["scaleX"], v["scaleY"], v["scaleZ"], 1.0])
+        order = int(self.value(node, "rotateOrder", time))
+        rotation = np.eye(4)
+        for axis in range(3):
+            angle = self.value(node, "rotateAxis" + "XYZ"[axis], time)
+            rotation = rotation.dot(axis_rotation(axis, angle))
+        for axis in ROTATE_ORDERS[order]:
+            rotation = rotation.dot(axis_rotation(axis, v["rotate" + "XYZ"[axis]]))
+        matrix = scale.dot(rotation)
+        if node.type == "joint":
+            orient = np.eye(4)
+            for axis in range(3):
+                angle = self.value(node, "jointOrient" + "XYZ"[axis], time)
+                orient = orient.dot(axis_rotation(axis, angle))
+            matrix = matrix.dot(orient)
+            if self.value(node, "segmentScaleCompensate", time):
+                inverse_scale = [
+                    self.value(node, "inverseScale" + axis, time) for axis in "XYZ"
+                ]
+                matrix = matrix.dot(np.diag([1.0 / s for s in inverse_scale] + [1.0]))
+        return matrix.dot(translation(v["translateX"], v["translateY"], v["translateZ"]))
+
+    def parent_matrix(self, node, time=None):
+        time = self.now() if time is None else time
+        if node.spaces:
+            space = int(round(self.value(node, node.space_attr, time)))
+            space = min(max(space, 0), len(node.spaces) - 1)
+            return node.spaces[space](time)
+        if node.parent:
+            return self.world_matrix(node.parent, time)
+        return np.eye(4)
+
+    def world_matrix(self, node, time=None):
+        return self.local_matrix(node, time).dot(self.parent_matrix(node, time))
+
+    def emit(self, event):
+        for callback in list(self.event_callbacks.get(event, {}).values()):
+            callback()
+
+    def set_value(self, node, attr, value):
+        # Like auto key: animated attributes get a key on the current frame
+        attribute = node.attributes[attr]
+        if attribute.curve:
+            attribute.curve.set_key(self.now(), value)
+        else:
+            attribute.value = value
+        for callback in list(node.changed_callbacks.values()):
+            callback(attr)
+
+    def set_world_matrix(self, node, matrix):
+        local = np.asarray(matrix, float).reshape(4, 4).dot(
+            np.linalg.inv(self.parent_matrix(node))
+        )
+        scale = np.linalg.norm(local[:3, :3], axis=1)
+        rotation = local[:3, :3] / scale[:, None]
+        # xyz rotate order only, enough for the stand-in
+        ry = math.asin(max(-1.0, min(1.0, -rotation[0, 2])))
+        rx = math.atan2(rotation[1, 2], rotation[2, 2])
+        rz = math.atan2(rotation[0, 1], rotation[0, 0])
+        values = list(local[3, :3]) + [rx, ry, rz] + list(scale)
+        for channel, value in zip(Node.CHANNELS, values):
+            self.set_value(node, channel, float(value))
+
+
+scene = Scene()
@@ -0,0 +1,11 @@
+"""
+shiboken2 stand-in, wraps every pointer in a new instance of the class.
+"""
+
+
+def wrapInstance(ptr, base):
+    return base()
+
+
+def isValid(obj):
+    return obj is not None